@@ -0,0 +1,38 @@
+import argparse
+import json
+import sys
+
+from benchmarks.suite import DEFAULT_SOLVERS, run_suite, select_cases, save, load, compare, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Rendering and solving benchmarks')
+    parser.add_argument('--cases', nargs='*', help='glob patterns of the case names, e.g. "simple/xor/*"')
+    parser.add_argument('--solvers', default=','.join(DEFAULT_SOLVERS), help='comma separated pysat solver names')
+    parser.add_argument('--repeat', type=int, default=1, help='runs of every case, the minimal times are taken')
+    parser.add_argument('--engine-options', type=json.loads, default=None, help='JSON of SATEngine keyword arguments')
+    parser.add_argument('--output', help='file to save the results to, e.g. a new baseline')
+    parser.add_argument('--compare', help='baseline file to compare the results with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative growth of a measurement')
+    args = parser.parse_args()
+
+    results = run_suite(cases=select_cases(args.cases), solvers=args.solvers.split(','), repeat=args.repeat,
+                        engine_options=args.engine_options)
+    if args.output:
+        save(results, args.output, engine_options=args.engine_options)
+    failures = failed(results)
+    if failures:
+        print(f'{len(failures)} failed cases: {", ".join(failures)}')
+    if args.compare:
+        regressions = compare(load(args.compare), results, threshold=args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        print(f'{len(regressions)} regressions against {args.compare}')
+        if regressions:
+            sys.exit(1)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
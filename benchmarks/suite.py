@@ -0,0 +1,180 @@
+"""
+Benchmarks of rendering and solving over a fixed matrix of targets. Every case runs in a forked process,
+so that its peak RSS is its own and the runs do not share caches
+"""
+import json
+import multiprocessing
+import platform
+import queue
+import sys
+from contextlib import redirect_stdout
+from fnmatch import fnmatch
+from io import StringIO
+from traceback import format_exc
+
+from builders import SimpleBuilder, RecurseBuilder
+from computers import mod_value_computer, mod_n_k_computer, mod_n_comb_computer
+from engines import SATEngine
+from metrics import Metrics
+from solvers.sat import Solver
+
+
+DEFAULT_SOLVERS = ['cd', 'g4', 'mcb']
+# measurements compared against the baseline, a greater value is worse
+COMPARED = ['render_time', 'solve_time', 'clauses', 'symbols', 'max_rss']
+POLL_INTERVAL = 1.0  # seconds between checks that a case process is alive
+
+
+def simple_case(name, computer, input_degree, output_degree, n_gates):
+    return name, SimpleBuilder, dict(input_degree=input_degree, output_degree=output_degree, n_gates=n_gates,
+                                     true_fun_computer=computer)
+
+
+def recurse_case(name, computer, input_degree, output_degree, n_gates, buffer_size):
+    return name, RecurseBuilder, dict(input_degree=input_degree, output_degree=output_degree, n_gates=n_gates,
+                                      buffer_size=buffer_size, true_comb_computer=computer)
+
+
+CASES = [
+    simple_case('simple/xor/4/3', mod_value_computer(2), 4, 1, 3),
+    simple_case('simple/xor/4/2', mod_value_computer(2), 4, 1, 2),
+    simple_case('simple/xor/6/5', mod_value_computer(2), 6, 1, 5),
+    simple_case('simple/mod3/3/5', mod_value_computer(3), 3, 2, 5),
+    simple_case('simple/mod3eq0/3/3', mod_n_k_computer(3, 0), 3, 1, 3),
+    simple_case('simple/mod3eq0/3/2', mod_n_k_computer(3, 0), 3, 1, 2),
+    simple_case('simple/mod4eq0/4/6', mod_n_k_computer(4, 0), 4, 1, 6),
+    recurse_case('recurse/comb3/1/2/4', mod_n_comb_computer(3), 1, 2, 4, 2),
+    recurse_case('recurse/comb3/1/2/3', mod_n_comb_computer(3), 1, 2, 3, 2),
+    recurse_case('recurse/comb4/1/2/3', mod_n_comb_computer(4), 1, 2, 3, 2),
+    recurse_case('recurse/comb3/2/2/7', mod_n_comb_computer(3), 2, 2, 7, 2),
+]
+
+
+def run_case(case, solver_name, engine_options=None):
+    """
+    Measurements of one case with one pysat solver
+    """
+    name, builder_cls, parameters = case
+    metrics = Metrics()
+    builder = builder_cls(engine=SATEngine(**(engine_options or {})), solver=Solver(name=solver_name), **parameters)
+    with redirect_stdout(StringIO()):
+        builder.prepare(metrics=metrics)
+        builder.run()
+    phases = {phase['name']: phase for phase in metrics.phases}
+    return {
+        'success': builder.success,
+        'render_time': phases['Rendering']['wall'],
+        'solve_time': phases['Solving']['wall'],
+        'clauses': metrics.info['clauses'],
+        'symbols': metrics.info['symbols'],
+        'max_rss': max(phase['max_rss'] or 0 for phase in metrics.phases),
+        'solver_stats': metrics.solver_stats,
+    }
+
+
+def run_suite(cases=CASES, solvers=DEFAULT_SOLVERS, repeat=1, engine_options=None, log=print):
+    """
+    {'<case>@<solver>': measurements}, the times are the minimum over `repeat` runs.
+    A case whose run failed (raised or its process died) has {'error': description} instead
+    """
+    results = {}
+    for case in cases:
+        for solver_name in solvers:
+            key = f'{case[0]}@{solver_name}'
+            runs = [_run_forked(case, solver_name, engine_options) for _ in range(repeat)]
+            errors = [run['error'] for run in runs if 'error' in run]
+            if errors:
+                results[key] = {'error': errors[0]}
+                log(f'{key}: FAILED {errors[0]}')
+                continue
+            result = runs[0]
+            for measurement in ('render_time', 'solve_time'):
+                result[measurement] = min(run[measurement] for run in runs)
+            results[key] = result
+            log(f'{key}: success={result["success"]}, render={result["render_time"]:.3f}s, '
+                f'solve={result["solve_time"]:.3f}s, clauses={result["clauses"]}, symbols={result["symbols"]}')
+    return results
+
+
+def _run_forked(case, solver_name, engine_options):
+    # the case is inherited by the forked process, computers are closures and cannot be pickled
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    worker = context.Process(target=_put_result, args=(results, case, solver_name, engine_options))
+    worker.start()
+    try:
+        while True:
+            try:
+                result = results.get(timeout=POLL_INTERVAL)
+                break
+            except queue.Empty:
+                # a process killed by a signal (e.g. by the OOM killer) never reports
+                if not worker.is_alive() and results.empty():
+                    result = {'error': f'process died with exit code {worker.exitcode}'}
+                    break
+    finally:
+        if worker.is_alive():
+            worker.kill()
+        worker.join()
+        results.close()
+    return result
+
+
+def _put_result(results, case, solver_name, engine_options):
+    try:
+        results.put(run_case(case, solver_name, engine_options))
+    except Exception:
+        results.put({'error': format_exc()})
+
+
+def failed(results) -> list:
+    """
+    Keys of the failed cases
+    """
+    return [key for key, result in sorted(results.items()) if 'error' in result]
+
+
+def select_cases(patterns) -> list:
+    if not patterns:
+        return CASES
+    return [case for case in CASES if any(fnmatch(case[0], pattern) for pattern in patterns)]
+
+
+def save(results, path, engine_options=None):
+    data = {
+        'meta': {'python': sys.version, 'platform': platform.platform(), 'engine_options': engine_options or {}},
+        'results': results,
+    }
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+
+
+def load(path) -> dict:
+    with open(path) as file:
+        return json.load(file)['results']
+
+
+def compare(baseline, results, threshold=0.2, min_time=0.01) -> list:
+    """
+    Descriptions of the regressions of `results` against `baseline`: a measurement greater than the baseline
+    by more than the `threshold` fraction, a different answer or a failed run. Times below `min_time` seconds
+    are too noisy to compare
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        if 'error' in result or 'error' in old:
+            if 'error' in result and 'error' not in old:
+                regressions.append(f'{key}: failed: {result["error"].strip().splitlines()[-1]}')
+            continue
+        if result['success'] != old['success']:
+            regressions.append(f'{key}: success {old["success"]} -> {result["success"]}')
+        for measurement in COMPARED:
+            before, after = old[measurement], result[measurement]
+            if measurement.endswith('_time') and max(before, after) < min_time:
+                continue
+            if after > before * (1 + threshold):
+                regressions.append(f'{key}: {measurement} {before} -> {after} (+{(after / before - 1) * 100 if before else float("inf"):.0f}%)')
+    return regressions
@@ -1,12 +1,27 @@
-from universal import Variable, Circuit, FunctionMapping, make_equalities
+from random import Random
+
+from cache import SynthesisCache
+from metrics import RenderAccounting
+from universal import Variable, Constant, Circuit, FunctionMapping, make_equalities
 from computers import FunctionTemplate
+from serializers import circuit_to_dict, circuit_from_dict, function_to_dict, function_from_dict
+from simulator import mismatches, row_inputs, set_bits
 from utils import time_and_log
 
 
 class BaseBuilder:
-    def __init__(self, engine, solver):
+    """
+    With a `cache` (SynthesisCache) a known result is taken from it in `prepare` and nothing is rendered or solved,
+    new results are stored in it after `run`.
+    With `metrics` (metrics.Metrics) given to `prepare` or `run`, the phases, the sizes made by every type
+    of renderable and the solver statistics are recorded in it, and it is finished at the end of `run`
+    """
+    def __init__(self, engine, solver, cache=None):
         self.engine = engine
         self.solver = solver
+        self.cache = cache
+        self.cached = False  # whether the result was taken from the cache
+        self.metrics = None
         self.success = None
         self.equalities = []
 
@@ -17,8 +32,7 @@ class BaseBuilder:
         raise NotImplementedError
 
     def render(self, **kwargs):
-        for eq in self.equalities:
-            eq.render(self.engine, **kwargs)
+        self.engine.render_all(self.equalities, **kwargs)
 
     def solve(self, **kwargs):
         self.engine.init_solver(self.solver)
@@ -28,38 +42,85 @@ class BaseBuilder:
     def decode(self, **kwargs):
         self.engine.consume_model(self.solver.get_model())
 
-    def prepare(self, **kwargs):
+    def load_cached(self) -> bool:
+        """
+        Takes the result from the cache if it is known there, returns whether it was
+        """
+        return False
+
+    def store_cached(self):
+        pass
+
+    def prepare(self, metrics=None, **kwargs):
         print(f'{self.__class__.__name__} preparation')
         self.log_parameters()
-        with time_and_log('Initialization'):
+        self._set_metrics(metrics)
+        if self.cache is not None:
+            with time_and_log('Cache lookup', self.metrics):
+                self.cached = self.load_cached()
+            if self.cached:
+                print('Result is taken from the cache')
+                return
+        with time_and_log('Initialization', self.metrics):
             self.initialize(**kwargs)
-        with time_and_log('Building'):
+        with time_and_log('Building', self.metrics):
             self.build(**kwargs)
-        with time_and_log('Rendering'):
+        with time_and_log('Rendering', self.metrics):
             self.render(**kwargs)
 
-    def run(self, **kwargs):
-        with time_and_log('Solving'):
-            self.success = self.solve(**kwargs)
-        print(f'Success: {self.success}')
-        if self.success:
-            self.decode(**kwargs)
+    def run(self, metrics=None, **kwargs):
+        self._set_metrics(metrics)
+        if self.cached:
+            print(f'Success: {self.success}')
+        else:
+            with time_and_log('Solving', self.metrics):
+                self.success = self.solve(**kwargs)
+            print(f'Success: {self.success}')
+            if self.success:
+                self.decode(**kwargs)
+            if self.cache is not None:
+                self.store_cached()
+        if self.metrics is not None:
+            self.collect_metrics()
+            self.metrics.finish()
 
-    def log_parameters(self):
+    def collect_metrics(self):
+        metrics = self.metrics
+        metrics.info.update(builder=self.__class__.__name__, parameters=self.parameters(), success=self.success,
+                            cached=self.cached)
+        metrics.info.update(self.engine.size_counters())
+        if hasattr(self.solver, 'accum_stats'):
+            metrics.solver_stats.update(self.solver.accum_stats())
+        if getattr(self.solver, 'winner', None) is not None:
+            metrics.solver_stats['winner'] = self.solver.winner
+
+    def _set_metrics(self, metrics):
+        if metrics is not None and metrics is not self.metrics:
+            self.metrics = metrics
+            self.engine.set_accounting(RenderAccounting(self.engine, metrics))
+
+    def parameters(self) -> dict:
         raise NotImplementedError
 
+    def log_parameters(self):
+        print(', '.join(f'{name}={value}' for name, value in self.parameters().items()))
+
 
 class SimpleBuilder(BaseBuilder):
-    def __init__(self, input_degree, output_degree, n_gates, true_fun_computer, **kwargs):
+    def __init__(self, input_degree, output_degree, n_gates, true_fun_computer, symmetry_breaking=(), fused_gates=False,
+                 **kwargs):
         super().__init__(**kwargs)
         self.input_degree = input_degree
         self.output_degree = output_degree
         self.n_gates = n_gates
         self.true_fun_computer = true_fun_computer
+        self.symmetry_breaking = symmetry_breaking
+        self.fused_gates = fused_gates
 
     def initialize(self, **kwargs):
         self.inputs = [Variable() for _ in range(self.input_degree)]
-        self.circuit = Circuit(input_degree=self.input_degree, output_degree=self.output_degree, n_gates=self.n_gates)
+        self.circuit = Circuit(input_degree=self.input_degree, output_degree=self.output_degree, n_gates=self.n_gates,
+                               symmetry_breaking=self.symmetry_breaking, fused_gates=self.fused_gates)
         self.true_fun = FunctionTemplate(input_degree=self.input_degree, output_degree=self.output_degree, computer=self.true_fun_computer).make_function()
 
     def build(self, **kwargs):
@@ -67,30 +128,243 @@ class SimpleBuilder(BaseBuilder):
         self.true_output = self.true_fun(self.inputs)
         self.equalities.extend(make_equalities(self.circuit_output, self.true_output))
 
+    def render(self, **kwargs):
+        super().render(**kwargs)
+        self.render_circuit(**kwargs)
+
+    def render_circuit(self, **kwargs):
+        self.circuit.render(self.engine, **kwargs)
+
     def decode(self, **kwargs):
         super().decode(**kwargs)
         self.circuit_result = self.engine.get_circuit_result(self.circuit)
 
-    def log_parameters(self):
-        print(f'input_degree={self.input_degree}, output_degree={self.output_degree}, n_gates={self.n_gates}')
+    def cache_target(self) -> str:
+        template = FunctionTemplate(input_degree=self.input_degree, output_degree=self.output_degree, computer=self.true_fun_computer)
+        return SynthesisCache.target('circuit', template.columns(), input_degree=self.input_degree, output_degree=self.output_degree)
+
+    def load_cached(self) -> bool:
+        self.target = self.cache_target()
+        if self.cache.is_unsat(self.target, self.n_gates):
+            self.success = False
+            return True
+        found = self.cache.get_result(self.target, self.n_gates)
+        if found is None:
+            return False
+        self.success = True
+        self.circuit_result = circuit_from_dict(found[1])
+        return True
+
+    def store_cached(self):
+        if self.success:
+            self.cache.store_result(self.target, len(self.circuit_result.gate_results), circuit_to_dict(self.circuit_result))
+        elif Circuit.is_complete(self.symmetry_breaking):
+            self.cache.store_unsat(self.target, self.n_gates)
+
+    def parameters(self) -> dict:
+        return dict(input_degree=self.input_degree, output_degree=self.output_degree, n_gates=self.n_gates,
+                    symmetry_breaking=self.symmetry_breaking, fused_gates=self.fused_gates)
+
+
+class MinimizingBuilder(SimpleBuilder):
+    """
+    Searches for the smallest circuit with at most `n_gates` gates. The circuit is rendered once, every gate gets
+    a selector symbol, and a circuit of k gates is requested by assuming the selectors of the other gates false.
+    So the solver must support assumptions and be incremental (pysat solvers) to reuse the learned clauses.
+    `lower_bound` is the number of gates known to be necessary (e.g. proven earlier), the search does not go below it.
+    With `direction='down'` the search starts from `n_gates` and stops at the first UNSAT,
+    with `direction='up'` it starts from `lower_bound` and stops at the first SAT.
+    With a cache, the lower bound proven earlier is used, and the search is skipped if a circuit of that size is known
+    """
+    def __init__(self, n_gates, lower_bound=0, direction='down', **kwargs):
+        super().__init__(n_gates=n_gates, **kwargs)
+        assert direction in ('down', 'up'), f'Unknown search direction {direction}'
+        self.lower_bound = lower_bound
+        self.direction = direction
+        self.min_gates = None
+        self.model = None
+        self.proven_unsat = None  # largest number of gates found to be not enough
+
+    def render_circuit(self, **kwargs):
+        # selectors go first, so that symmetry breaking lets disabled gates stay unused
+        self.selectors = self.engine.render_gate_selectors(self.circuit, **kwargs)
+        super().render_circuit(**kwargs)
+
+    def solve(self, **kwargs):
+        self.engine.init_solver(self.solver)
+        self.engine.log_stat()
+        if self.direction == 'down':
+            k = self.n_gates
+            while k >= self.lower_bound and self._solve_with(k):
+                used = len(self._decode_model(self.solver.get_model()).used_gates())
+                if used == k or k == self.lower_bound:
+                    self.min_gates, self.model = k, self.solver.get_model()
+                    k -= 1
+                else:
+                    # the model fits into fewer gates, get a model which uses exactly the first `used` ones,
+                    # or the first `lower_bound` ones if the bound is loose
+                    k = max(used, self.lower_bound)
+        else:
+            for k in range(self.lower_bound, self.n_gates + 1):
+                if self._solve_with(k):
+                    self.min_gates, self.model = k, self.solver.get_model()
+                    break
+        print(f'Minimal number of gates: {self.min_gates}')
+        return self.min_gates is not None
+
+    def decode(self, **kwargs):
+        self.circuit_result = self._decode_model(self.model).prefix(self.min_gates)
+
+    def load_cached(self) -> bool:
+        self.target = self.cache_target()
+        self.lower_bound = max(self.lower_bound, self.cache.lower_bound(self.target))
+        if self.lower_bound > self.n_gates:
+            self.success = False
+            return True
+        found = self.cache.get_result(self.target, self.lower_bound)
+        if found is None:
+            return False
+        self.success = True
+        self.min_gates = found[0]
+        self.circuit_result = circuit_from_dict(found[1])
+        return True
+
+    def store_cached(self):
+        if self.success:
+            self.cache.store_result(self.target, self.min_gates, circuit_to_dict(self.circuit_result))
+        if self.proven_unsat is not None and Circuit.is_complete(self.symmetry_breaking):
+            self.cache.store_unsat(self.target, self.proven_unsat)
+
+    def _solve_with(self, n_gates):
+        with time_and_log(f'Solving with {n_gates} gates', self.metrics):
+            success = self.solver.solve(assumptions=[-selector for selector in self.selectors[n_gates:]])
+        if not success:
+            self.proven_unsat = max(n_gates, self.proven_unsat if self.proven_unsat is not None else n_gates)
+        return success
+
+    def _decode_model(self, model):
+        self.engine.consume_model(model)
+        return self.engine.get_circuit_result(self.circuit)
+
+    def parameters(self) -> dict:
+        return dict(super().parameters(), lower_bound=self.lower_bound, direction=self.direction)
+
+
+class CegarBuilder(BaseBuilder):
+    """
+    Counterexample-guided synthesis for input degrees where the full truth table is too large to encode.
+    The circuit is encoded only on a set of sample inputs: every sample applies the circuit to constants
+    and fixes its outputs to the expected ones. A found circuit is checked against the whole function,
+    up to `batch_size` failing inputs become new samples and the solver continues with the added clauses,
+    so it must be incremental (pysat solvers). The search stops when a circuit passes the check (success)
+    or when the samples alone have no circuit of `n_gates` gates (failure, which is then exact).
+    `n_samples` random inputs (and the all-zero one) are sampled at the start, `seed` makes them reproducible
+    """
+    def __init__(self, input_degree, output_degree, n_gates, true_fun_computer, n_samples=8, batch_size=1,
+                 max_iterations=None, seed=0, symmetry_breaking=(), fused_gates=False, **kwargs):
+        super().__init__(**kwargs)
+        self.input_degree = input_degree
+        self.output_degree = output_degree
+        self.n_gates = n_gates
+        self.true_fun_computer = true_fun_computer
+        self.n_samples = n_samples
+        self.batch_size = batch_size
+        self.max_iterations = max_iterations
+        self.seed = seed
+        self.symmetry_breaking = symmetry_breaking
+        self.fused_gates = fused_gates
+        self.samples = []
+        self.circuit_result = None
+        self.iterations = 0
+
+    def initialize(self, **kwargs):
+        self.circuit = Circuit(input_degree=self.input_degree, output_degree=self.output_degree, n_gates=self.n_gates,
+                               symmetry_breaking=self.symmetry_breaking, fused_gates=self.fused_gates)
+        self.true_fun = FunctionTemplate(input_degree=self.input_degree, output_degree=self.output_degree, computer=self.true_fun_computer)
+        self.true_columns = None
+        self.n_rendered = 0
+        self.n_fed = 0
+
+    def build(self, **kwargs):
+        random = Random(self.seed)
+        samples = {(False,) * self.input_degree}
+        while len(samples) < min(self.n_samples + 1, 2 ** self.input_degree):
+            samples.add(tuple(bool(random.getrandbits(1)) for _ in range(self.input_degree)))
+        for inputs in sorted(samples):
+            self.add_sample(inputs)
+
+    def add_sample(self, inputs):
+        assert len(inputs) == self.input_degree, f'Wrong input size: {len(inputs)} instead of {self.input_degree}'
+        self.samples.append(tuple(inputs))
+        circuit_output = self.circuit([Constant(value) for value in inputs])
+        expected = [Constant(value) for value in self.true_fun.compute(inputs)]
+        self.equalities.extend(make_equalities(circuit_output, expected))
+
+    def render(self, **kwargs):
+        self.engine.render_all(self.equalities[self.n_rendered:], **kwargs)
+        if not self.n_rendered:
+            self.circuit.render(self.engine, **kwargs)
+        self.n_rendered = len(self.equalities)
+
+    def solve(self, **kwargs):
+        while self.max_iterations is None or self.iterations < self.max_iterations:
+            self.iterations += 1
+            self.engine.init_solver(self.solver, start=self.n_fed)
+            self.n_fed = len(self.engine.clauses)
+            with time_and_log(f'Iteration {self.iterations} with {len(self.samples)} samples', self.metrics):
+                if not self.solver.solve():
+                    return False
+            self.engine.consume_model(self.solver.get_model())
+            self.circuit_result = self.engine.get_circuit_result(self.circuit)
+            counterexamples = self.find_counterexamples(self.circuit_result)
+            if not counterexamples:
+                return True
+            for inputs in counterexamples:
+                self.add_sample(inputs)
+            self.render(**kwargs)
+        print(f'No verified circuit after {self.iterations} iterations')
+        return False
+
+    def find_counterexamples(self, circuit_result) -> list:
+        """
+        Up to `batch_size` inputs on which the circuit differs from the function
+        """
+        if self.true_columns is None:
+            self.true_columns = self.true_fun.columns()
+        failing = mismatches(circuit_result, self.true_fun, expected=self.true_columns)
+        return [row_inputs(row, self.input_degree) for row in set_bits(failing, limit=self.batch_size)]
+
+    def decode(self, **kwargs):
+        # the verified circuit is decoded in `solve`
+        pass
+
+    def parameters(self) -> dict:
+        return dict(input_degree=self.input_degree, output_degree=self.output_degree, n_gates=self.n_gates,
+                    n_samples=self.n_samples, batch_size=self.batch_size, symmetry_breaking=self.symmetry_breaking,
+                    fused_gates=self.fused_gates)
 
 
 class RecurseBuilder(BaseBuilder):
-    def __init__(self, input_degree, output_degree, n_gates, buffer_size, true_comb_computer, **kwargs):
+    def __init__(self, input_degree, output_degree, n_gates, buffer_size, true_comb_computer, symmetry_breaking=(), fused_gates=False,
+                 **kwargs):
         super().__init__(**kwargs)
         self.input_degree = input_degree
         self.output_degree = output_degree
         self.n_gates = n_gates
         self.buffer_size = buffer_size
         self.true_comb_computer = true_comb_computer
+        self.symmetry_breaking = symmetry_breaking
+        self.fused_gates = fused_gates
 
-    def log_parameters(self):
-        print(f'input_degree={self.input_degree}, output_degree={self.output_degree}, n_gates={self.n_gates}, buffer_size={self.buffer_size}')
+    def parameters(self) -> dict:
+        return dict(input_degree=self.input_degree, output_degree=self.output_degree, n_gates=self.n_gates,
+                    buffer_size=self.buffer_size, symmetry_breaking=self.symmetry_breaking, fused_gates=self.fused_gates)
 
     def initialize(self, **kwargs):
         self.inputs = [Variable() for _ in range(self.input_degree)]
         self.buffer_inputs = [Variable() for _ in range(self.buffer_size)]
-        self.circuit = Circuit(input_degree=self.input_degree + self.buffer_size, output_degree=self.buffer_size, n_gates=self.n_gates)
+        self.circuit = Circuit(input_degree=self.input_degree + self.buffer_size, output_degree=self.buffer_size, n_gates=self.n_gates,
+                               symmetry_breaking=self.symmetry_breaking, fused_gates=self.fused_gates)
         self.inv = FunctionMapping(input_degree=self.buffer_size, output_degree=self.output_degree)
         self.true_fun = FunctionTemplate(input_degree=self.input_degree+self.output_degree, output_degree=self.output_degree, computer=self.true_comb_computer).make_function()
 
@@ -100,7 +374,37 @@ class RecurseBuilder(BaseBuilder):
         self.true_output = self.true_fun(self.inputs + list(self.inv(self.buffer_inputs)))
         self.equalities.extend(make_equalities(self.inv_output, self.true_output))
 
+    def render(self, **kwargs):
+        super().render(**kwargs)
+        self.circuit.render(self.engine, **kwargs)
+
     def decode(self, **kwargs):
         super().decode(**kwargs)
         self.circuit_result = self.engine.get_circuit_result(self.circuit)
         self.inv_result = self.engine.get_function_result(self.inv)
+
+    def cache_target(self) -> str:
+        template = FunctionTemplate(input_degree=self.input_degree + self.output_degree, output_degree=self.output_degree,
+                                    computer=self.true_comb_computer)
+        return SynthesisCache.target('recurse', template.columns(), input_degree=self.input_degree,
+                                     output_degree=self.output_degree, buffer_size=self.buffer_size)
+
+    def load_cached(self) -> bool:
+        self.target = self.cache_target()
+        if self.cache.is_unsat(self.target, self.n_gates):
+            self.success = False
+            return True
+        found = self.cache.get_result(self.target, self.n_gates)
+        if found is None:
+            return False
+        self.success = True
+        self.circuit_result = circuit_from_dict(found[1]['circuit'])
+        self.inv_result = function_from_dict(found[1]['inverse'])
+        return True
+
+    def store_cached(self):
+        if self.success:
+            data = {'circuit': circuit_to_dict(self.circuit_result), 'inverse': function_to_dict(self.inv_result)}
+            self.cache.store_result(self.target, len(self.circuit_result.gate_results), data)
+        elif Circuit.is_complete(self.symmetry_breaking):
+            self.cache.store_unsat(self.target, self.n_gates)
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import sqlite3
+
+
+class SynthesisCache:
+    """
+    Persistent results of synthesis in an SQLite database at `path` (':memory:' for a cache of one process).
+    A target is a string made by `target`: the kind of the problem, its degrees and the hash of the packed truth table.
+    For every target the cache keeps found results (JSON data with the number of gates they use)
+    and the proven lower bound: the number of gates without which the target has no circuit
+    """
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS results (target TEXT, n_gates INTEGER, data TEXT, PRIMARY KEY (target, n_gates))',
+        'CREATE TABLE IF NOT EXISTS bounds (target TEXT PRIMARY KEY, lower_bound INTEGER)',
+    ]
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            for statement in self.SCHEMA:
+                self.connection.execute(statement)
+
+    @staticmethod
+    def target(kind, columns, **parameters) -> str:
+        """
+        Key of a target, `columns` is its truth table as packed output columns (see `FunctionTemplate.columns`)
+        and `parameters` are the degrees and whatever else defines the problem
+        """
+        digest = hashlib.sha256()
+        for column in columns:
+            digest.update(column.to_bytes((column.bit_length() + 7) // 8, 'little'))
+            digest.update(b'|')
+        description = ','.join(f'{name}={value}' for name, value in sorted(parameters.items()))
+        return f'{kind}:{description}:{digest.hexdigest()}'
+
+    def get_result(self, target, n_gates):
+        """
+        (number of gates, data) of the smallest stored result with at most `n_gates` gates, or None
+        """
+        row = self.connection.execute(
+            'SELECT n_gates, data FROM results WHERE target = ? AND n_gates <= ? ORDER BY n_gates LIMIT 1',
+            (target, n_gates),
+        ).fetchone()
+        return row and (row[0], json.loads(row[1]))
+
+    def store_result(self, target, n_gates, data):
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)', (target, n_gates, json.dumps(data)))
+
+    def lower_bound(self, target) -> int:
+        row = self.connection.execute('SELECT lower_bound FROM bounds WHERE target = ?', (target,)).fetchone()
+        return row[0] if row else 0
+
+    def store_unsat(self, target, n_gates):
+        """
+        Records that the target has no circuit of `n_gates` gates (and so of fewer)
+        """
+        if n_gates + 1 > self.lower_bound(target):
+            with self.connection:
+                self.connection.execute('INSERT OR REPLACE INTO bounds VALUES (?, ?)', (target, n_gates + 1))
+
+    def is_unsat(self, target, n_gates) -> bool:
+        return n_gates < self.lower_bound(target)
+
+    def close(self):
+        self.connection.close()
@@ -1,4 +1,6 @@
+from functools import reduce
 from math import log2, ceil
+from operator import or_
 
 from utils import all_inputs
 from universal import FunctionMapping
@@ -9,19 +11,50 @@ def minimal_dim(max_value):
 
 
 class FunctionTemplate:
+    """
+    `computer` maps a tuple of input values to the list of output values. It may also have a `batch` attribute,
+    a function of `input_degree` returning the packed output columns over the whole input space at once
+    (see `columns`), which is then used instead of calling the computer on every input
+    """
     def __init__(self, input_degree, output_degree, computer):
         self.input_degree = input_degree
         self.output_degree = output_degree
         self.computer = computer
 
+    def compute(self, inputs, zerofill=True) -> list:
+        """
+        Output of the function on `inputs`, filled with leading zeroes up to `output_degree`
+        """
+        output = self.computer(inputs)
+        if len(output) < self.output_degree:
+            assert zerofill, f'Output "{output}" is too short, but filling with zeroes is prohibited'
+            output = [0] * (self.output_degree - len(output)) + output
+        return output
+
     def set_truthtable(self, function: FunctionMapping, zerofill=True):
-        for inp in all_inputs(dim=self.input_degree):
-            output = self.computer(inp)
-            if len(output) < self.output_degree:
-                assert zerofill, f'Output "{output}" is too short, but filling with zeroes is prohibited'
-                output = [0] * (self.output_degree - len(output)) + output
-            for index, value in enumerate(output):
-                function.set_value(input_values=inp, output_index=index, output_value=value)
+        for index, column in enumerate(self.columns(zerofill=zerofill)):
+            function.set_column(output_index=index, column=column)
+
+    def columns(self, zerofill=True) -> list:
+        """
+        Output columns over the whole input space: bit `r` of a column is the output on the `r`-th input of `all_inputs`
+        """
+        batch = getattr(self.computer, 'batch', None)
+        if batch is None:
+            return self._row_columns(zerofill=zerofill)
+        columns = batch(self.input_degree)
+        if len(columns) < self.output_degree:
+            assert zerofill, f'Output has {len(columns)} columns, but filling with zeroes is prohibited'
+            columns = [0] * (self.output_degree - len(columns)) + columns
+        return columns
+
+    def _row_columns(self, zerofill=True) -> list:
+        columns = [0] * self.output_degree
+        for row, inp in enumerate(all_inputs(dim=self.input_degree)):
+            for index, value in enumerate(self.compute(inp, zerofill=zerofill)):
+                if value:
+                    columns[index] |= 1 << row
+        return columns
 
     def make_function(self) -> FunctionMapping:
         function = FunctionMapping(input_degree=self.input_degree, output_degree=self.output_degree)
@@ -37,6 +70,31 @@ def list_to_number(l: list):
     return int(''.join(map(lambda x: str(int(x)), l)), 2)
 
 
+def mod_count_columns(n, n_inputs, step=1) -> list:
+    """
+    `columns[v]` is the mask of the rows of `n_inputs` inputs whose number of ones is `v` modulo `n`,
+    with row `r` at bit `r * step`. The table is built by doubling: adding an input as the most significant bit
+    keeps the rows of the lower half and shifts the upper half, which has one more one
+    """
+    columns = [0] * n
+    columns[0] = 1
+    width = step
+    for _ in range(n_inputs):
+        columns = [columns[v] | columns[v - 1] << width for v in range(n)]
+        width *= 2
+    return columns
+
+
+def residue_bits(residue_columns, dim) -> list:
+    """
+    Columns of the binary representation (most significant bit first) of a value given by the masks of its residues
+    """
+    return [
+        reduce(or_, (column for value, column in enumerate(residue_columns) if value >> (dim - 1 - bit) & 1), 0)
+        for bit in range(dim)
+    ]
+
+
 def mod_value_computer(n, dim=None):
     dim = dim or minimal_dim(n-1)
 
@@ -45,6 +103,10 @@ def mod_value_computer(n, dim=None):
         result_value = int_value % n
         return number_to_list(result_value, pad=dim)
 
+    def batch(input_degree):
+        return residue_bits(mod_count_columns(n, input_degree), dim)
+
+    computer.batch = batch
     return computer
 
 
@@ -56,6 +118,10 @@ def mod_n_k_computer(n, k):
         result_value = int((int_value % n) == k)
         return number_to_list(result_value)
 
+    def batch(input_degree):
+        return [mod_count_columns(n, input_degree)[k]]
+
+    computer.batch = batch
     return computer
 
 
@@ -68,4 +134,14 @@ def mod_n_comb_computer(n, dim=None):
         result = (list_to_number(buffer) + sum(inputs)) % n
         return number_to_list(result, pad=dim)
 
+    def batch(input_degree):
+        # the buffer inputs are the lowest bits of the row, so the counted inputs are 2^dim rows apart
+        counts = mod_count_columns(n, input_degree - dim, step=2 ** dim)
+        result = [0] * n
+        for buffer_value in range(2 ** dim):
+            for count, column in enumerate(counts):
+                result[(buffer_value + count) % n] |= column << buffer_value
+        return residue_bits(result, dim)
+
+    computer.batch = batch
     return computer
@@ -0,0 +1,215 @@
+from array import array
+
+
+DIMACS_CHUNK_SIZE = 1 << 20  # literals formatted at once when writing DIMACS
+
+
+class ClauseSink:
+    """
+    Destination of rendered clauses. Every sink counts the clauses and tracks the maximal variable id
+    """
+    def __init__(self):
+        self.n_clauses = 0
+        self.max_variable = 0
+
+    def append(self, clause):
+        self.extend([clause])
+
+    def extend(self, clauses):
+        raise NotImplementedError
+
+    def feed(self, solver, start=0):
+        """
+        Makes `solver` have the clauses that were added to the sink, starting from the `start`-th one
+        """
+        raise NotImplementedError
+
+    def __len__(self):
+        return self.n_clauses
+
+    def _account(self, literals):
+        """
+        Updates the counters with a zero-terminated flat buffer of the added clauses
+        """
+        if literals:
+            self.n_clauses += literals.count(0)
+            self.max_variable = max(self.max_variable, max(literals), -min(literals))
+
+
+class ClauseStore(ClauseSink):
+    """
+    Clauses kept in one flat buffer of literals, every clause is terminated by zero as in DIMACS.
+    `offsets[i]` is the position of the first literal of the `i`-th clause in `literals`
+    """
+    def __init__(self):
+        super().__init__()
+        self.literals = array('i')
+        self.offsets = array('q')
+
+    def extend(self, clauses):
+        literals = self.literals
+        offsets = self.offsets
+        start = len(literals)
+        for clause in clauses:
+            offsets.append(len(literals))
+            literals.extend(clause)
+            literals.append(0)
+        self._account(literals[start:])
+
+    def copy(self, n_clauses=None) -> 'ClauseStore':
+        """
+        Independent store with the first `n_clauses` clauses (all by default)
+        """
+        n_clauses = len(self) if n_clauses is None else n_clauses
+        assert 0 <= n_clauses <= len(self), f'Store has only {len(self)} clauses'
+        result = ClauseStore()
+        result.literals = self.literals[:self.offsets[n_clauses] if n_clauses < len(self) else len(self.literals)]
+        result.offsets = self.offsets[:n_clauses]
+        result._account(result.literals)
+        return result
+
+    def feed(self, solver, start=0):
+        if start:
+            solver.append_formula(self[index] for index in range(start, len(self)))
+        else:
+            solver.append_formula(self)
+
+    def write_dimacs(self, stream, chunk_size=DIMACS_CHUNK_SIZE):
+        """
+        Writes the clauses to a binary `stream` in DIMACS format, formatting them in chunks of about `chunk_size` literals
+        """
+        stream.write(f'p cnf {self.max_variable} {len(self)}\n'.encode())
+        write_literals(stream, self.literals, chunk_size=chunk_size)
+
+    def __getitem__(self, index) -> list:
+        assert 0 <= index < len(self.offsets), f'Clause index must be in range [0, {len(self.offsets)})'
+        return self.literals[self.offsets[index]:self._end(index)].tolist()
+
+    def __iter__(self):
+        for index in range(len(self.offsets)):
+            yield self[index]
+
+    def _end(self, index):
+        if index + 1 < len(self.offsets):
+            return self.offsets[index + 1] - 1
+        return len(self.literals) - 1
+
+
+class SolverSink(ClauseSink):
+    """
+    Passes the clauses straight to an incremental solver (pysat solvers), nothing is kept in memory
+    """
+    def __init__(self, solver):
+        super().__init__()
+        self.solver = solver
+
+    def extend(self, clauses):
+        clauses = list(clauses)
+        self.solver.append_formula(clauses)
+        for clause in clauses:
+            self.n_clauses += 1
+            if clause:
+                self.max_variable = max(self.max_variable, max(clause), -min(clause))
+
+    def feed(self, solver, start=0):
+        assert solver is self.solver, 'Clauses were rendered into another solver'
+
+
+class DimacsSink(ClauseSink):
+    """
+    Writes the clauses in DIMACS format to a binary stream (a file or a solver's stdin) in chunks.
+    The header must come first, so either the numbers of variables and clauses are given up front
+    (e.g. from a dry run into a CountingSink) and checked in `close`, or the stream must be seekable:
+    then a blank header is reserved and filled in `close`.
+    `feed` closes the sink and hands the written formula to a BinarySolver (see `BinarySolver.use_dimacs`)
+    """
+    HEADER_WIDTH = 64
+
+    def __init__(self, stream, chunk_size=DIMACS_CHUNK_SIZE, n_variables=None, n_clauses=None):
+        super().__init__()
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = array('i')
+        self.closed = False
+        assert (n_variables is None) == (n_clauses is None), 'Both numbers of variables and clauses must be given'
+        self.declared = None if n_variables is None else (n_variables, n_clauses)
+        if self.declared is not None:
+            stream.write(f'p cnf {n_variables} {n_clauses}\n'.encode())
+        else:
+            assert stream.seekable(), 'A stream that cannot seek needs the numbers of variables and clauses up front'
+            self.header_position = stream.tell()
+            stream.write(b' ' * (self.HEADER_WIDTH - 1) + b'\n')
+
+    def extend(self, clauses):
+        assert not self.closed, 'Sink is closed'
+        buffer = self.buffer
+        start = len(buffer)
+        for clause in clauses:
+            buffer.extend(clause)
+            buffer.append(0)
+        self._account(buffer[start:])
+        if len(buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        write_literals(self.stream, self.buffer, chunk_size=self.chunk_size)
+        self.buffer = array('i')
+        self.stream.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        if self.declared is not None:
+            n_variables, n_clauses = self.declared
+            assert self.n_clauses == n_clauses and self.max_variable <= n_variables, \
+                f'Written {self.n_clauses} clauses over {self.max_variable} variables, ' \
+                f'header says {n_clauses} clauses over {n_variables} variables'
+            return
+        header = f'p cnf {self.max_variable} {self.n_clauses}'.encode()
+        assert len(header) < self.HEADER_WIDTH, f'Header {header} does not fit into the reserved space'
+        end_position = self.stream.tell()
+        self.stream.seek(self.header_position)
+        self.stream.write(header)
+        self.stream.seek(end_position)
+        self.stream.flush()
+
+    def feed(self, solver, start=0):
+        assert start == 0, 'DIMACS stream cannot be extended'
+        assert hasattr(solver, 'use_dimacs'), 'Clauses were written to a DIMACS stream, only a BinarySolver can use it'
+        self.close()
+        solver.use_dimacs(self)
+
+
+class CountingSink(ClauseSink):
+    """
+    Only counts the clauses and literals, to estimate the formula size without keeping it
+    """
+    def __init__(self):
+        super().__init__()
+        self.n_literals = 0
+
+    def extend(self, clauses):
+        for clause in clauses:
+            self.n_clauses += 1
+            if clause:
+                self.n_literals += len(clause)
+                self.max_variable = max(self.max_variable, max(clause), -min(clause))
+
+    def feed(self, solver, start=0):
+        raise RuntimeError('Clauses were only counted, render them into another sink to solve')
+
+
+def write_literals(stream, literals, chunk_size=DIMACS_CHUNK_SIZE):
+    """
+    Writes a zero-terminated flat buffer of clauses as DIMACS lines, splitting it into chunks at clause ends
+    """
+    start = 0
+    while start < len(literals):
+        end = literals.index(0, min(start + chunk_size, len(literals)) - 1) + 1
+        # every terminator is the token '0' (no other token starts with 0), so ' 0' ends a clause; the leading space
+        # lets an empty clause at the start be found too, and the spaces left at the line starts are removed
+        text = (' ' + ' '.join(map(str, literals[start:end]))).replace(' 0', ' 0\n').replace('\n ', '\n')
+        stream.write(text[1:].encode())
+        start = end
@@ -13,24 +13,30 @@ class SATDecoder(Decoder):
 
     def get_choice_result(self, choice) -> ChoiceMappingResult:
         self._check_model_consumed()
-        choice_id = str(choice)
-        for symbol, indices in zip(self.choices[choice_id], combinations(range(choice.input_degree), choice.output_degree)):
-            if self.symbol_values[self.symbols[symbol]]:
+        if choice in self.operands:
+            indices = tuple(
+                operand + [self.symbol_values[symbol] for symbol in selectors].index(True)
+                for operand, selectors in enumerate(self.operands[choice])
+            )
+            return ChoiceMappingResult(indices, input_degree=choice.input_degree, output_degree=choice.output_degree)
+        for symbol, indices in zip(self.choices[choice], combinations(range(choice.input_degree), choice.output_degree)):
+            if self.symbol_values[symbol]:
                 return ChoiceMappingResult(indices, input_degree=choice.input_degree, output_degree=choice.output_degree)
         assert False, 'No choice was marked as a correct one'
 
     def get_function_result(self, func) -> FunctionMappingResult:
         self._check_model_consumed()
         result = FunctionMappingResult(input_degree=func.input_degree, output_degree=func.output_degree)
-        func_id = str(func)
-        for out_ind in range(func.output_degree):
-            for index, symb in enumerate(self.functions[func_id][out_ind]):
-                output_value = self.symbol_values[self.symbols[symb]]
-                result.set_value(input_index=index, output_index=out_ind, output_value=output_value)
+        for out_ind, symbols in enumerate(self.functions[func]):
+            # the first symbol is the lowest bit of the column
+            bits = ''.join('1' if self.symbol_values[symb] else '0' for symb in reversed(symbols))
+            result.set_column(output_index=out_ind, column=int(bits, 2))
         assert result.is_valid(), f'Could not fill result for FunctionMapping {func}'
         return result
 
     def consume_model(self, model):
+        if self.preprocessor is not None:
+            model = self.preprocessor.extend_model(model)
         # TODO remove this hack, it's here because symbols start with 1
         self.symbol_values = [None]
         for val in model:
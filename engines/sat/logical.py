@@ -1,13 +1,90 @@
-from itertools import combinations
+from itertools import combinations, product
+from math import ceil, log2
 
 
-def exactly_one(symb_ids):
-    result = [symb_ids]
-    for u, v in combinations(symb_ids, 2):
-        result.append([-u, -v])
+def exactly_one(symb_ids, encoding='pairwise', new_symbols=None):
+    """
+    `encoding` is one of AT_MOST_ONE_ENCODINGS, all of them except the pairwise one need `new_symbols(n)`
+    returning n fresh symbol ids for auxiliary variables
+    """
+    return [list(symb_ids)] + at_most_one(symb_ids, encoding=encoding, new_symbols=new_symbols)
+
+
+def at_most_one(symb_ids, encoding='pairwise', new_symbols=None):
+    assert encoding in AT_MOST_ONE_ENCODINGS, f'Unknown at-most-one encoding {encoding}'
+    if encoding == 'pairwise' or len(symb_ids) <= 1:
+        return at_most_one_pairwise(symb_ids)
+    assert new_symbols is not None, f'Encoding {encoding} needs auxiliary symbols'
+    return AT_MOST_ONE_ENCODINGS[encoding](symb_ids, new_symbols)
+
+
+def at_most_one_pairwise(symb_ids, new_symbols=None):
+    """
+    O(n^2) clauses, no auxiliary symbols
+    """
+    return [[-u, -v] for u, v in combinations(symb_ids, 2)]
+
+
+def at_most_one_sequential(symb_ids, new_symbols):
+    """
+    Sequential counter (ladder): auxiliary s_i is true if any of x_1..x_i is true, 3n clauses and n - 1 symbols
+    """
+    symb_ids = list(symb_ids)
+    counters = new_symbols(len(symb_ids) - 1)
+    result = [[-symb_ids[0], counters[0]]]
+    for symb, prev_counter, counter in zip(symb_ids[1:], counters, counters[1:]):
+        result.append([-symb, counter])
+        result.append([-prev_counter, counter])
+        result.append([-symb, -prev_counter])
+    result.append([-symb_ids[-1], -counters[-1]])
+    return result
+
+
+def at_most_one_commander(symb_ids, new_symbols, group_size=3):
+    """
+    Commander encoding: pairwise inside groups of `group_size`, a group's commander is implied by its members,
+    and at most one commander is true (recursively)
+    """
+    symb_ids = list(symb_ids)
+    if len(symb_ids) <= group_size + 1:
+        return at_most_one_pairwise(symb_ids)
+    groups = [symb_ids[start:start + group_size] for start in range(0, len(symb_ids), group_size)]
+    commanders = new_symbols(len(groups))
+    result = []
+    for group, commander in zip(groups, commanders):
+        result.extend(at_most_one_pairwise(group))
+        result.extend([-symb, commander] for symb in group)
+    result.extend(at_most_one_commander(commanders, new_symbols, group_size=group_size))
+    return result
+
+
+def at_most_one_bimander(symb_ids, new_symbols, group_size=2):
+    """
+    Bimander encoding: pairwise inside groups of `group_size`, every member of group `i` forces the binary code of `i`
+    on ceil(log2(n_groups)) auxiliary symbols
+    """
+    symb_ids = list(symb_ids)
+    groups = [symb_ids[start:start + group_size] for start in range(0, len(symb_ids), group_size)]
+    if len(groups) == 1:
+        return at_most_one_pairwise(symb_ids)
+    bits = new_symbols(ceil(log2(len(groups))))
+    result = []
+    for group_index, group in enumerate(groups):
+        result.extend(at_most_one_pairwise(group))
+        for bit_index, bit in enumerate(bits):
+            literal = bit if (group_index >> bit_index) & 1 else -bit
+            result.extend([-symb, literal] for symb in group)
     return result
 
 
+AT_MOST_ONE_ENCODINGS = {
+    'pairwise': at_most_one_pairwise,
+    'sequential': at_most_one_sequential,
+    'commander': at_most_one_commander,
+    'bimander': at_most_one_bimander,
+}
+
+
 def equals_value(symb, val: bool):
     if val:
         return [symb]
@@ -21,3 +98,31 @@ def if_then(all_true, then):
 
 def equal_symbols(symb1, symb2):
     return [[symb1, -symb2], [-symb1, symb2]]
+
+
+def equal_columns(column1, column2, condition=()):
+    """
+    Clauses of `condition => (column1[i] == column2[i])` for all i at once
+    """
+    negated = [-symbol for symbol in condition]
+    result = []
+    for symb1, symb2 in zip(column1, column2):
+        result.append([*negated, symb1, -symb2])
+        result.append([*negated, -symb1, symb2])
+    return result
+
+
+def function_output_block(out_column, fun_symbs, input_columns, condition=()):
+    """
+    Clauses of `condition => (out_column[i] == f(input_columns[0][i], .., input_columns[n-1][i]))` for all i at once,
+    where f is given by the symbols of its truth table rows (ordered as `utils.all_inputs`).
+    Every clause has width len(condition) + n + 2: the negated condition and row precondition followed by one half of the equality
+    """
+    negated = [-symbol for symbol in condition]
+    result = []
+    for out_symb, *input_symbs in zip(out_column, *input_columns):
+        # product yields the negated preconditions in the order of the truth table rows
+        for precondition, fun_symb in zip(product(*[(symb, -symb) for symb in input_symbs]), fun_symbs):
+            result.append([*negated, *precondition, out_symb, -fun_symb])
+            result.append([*negated, *precondition, -out_symb, fun_symb])
+    return result
@@ -0,0 +1,220 @@
+from array import array
+from collections import Counter, defaultdict
+from itertools import accumulate
+
+from engines.sat.clauses import ClauseStore
+
+
+class Preprocessor:
+    """
+    Simplifies a formula before it is given to the solver: removes duplicate and tautological clauses,
+    propagates unit clauses (dropping satisfied clauses and false literals) and, with `eliminate`,
+    does bounded variable elimination: a symbol is replaced by the resolvents of its clauses if there are
+    no more of them than the clauses, and at most `elimination_limit` pairs have to be resolved.
+    Symbols fixed or eliminated here are not in the simplified formula, `extend_model` restores their values.
+    `frozen` symbols are never eliminated and keep their unit clauses, they can be used in assumptions
+    or in constraints given to the solver separately.
+
+    The formula is kept in flat ClauseStore arrays with an offset-based occurrence index (see `OccurrenceIndex`),
+    besides them removing duplicates needs a dict of clause hashes, about 100 bytes per clause.
+    Elimination also keeps the occurrences of its resolvents and the clauses of eliminated symbols in lists
+    """
+    def __init__(self, eliminate=False, elimination_limit=16, frozen=()):
+        self.eliminate = eliminate
+        self.elimination_limit = elimination_limit
+        self.frozen = set(frozen)
+        self.values = {}  # symbol -> value fixed by unit propagation
+        self.eliminated = []  # [(symbol, [clauses with the positive literal of the symbol])] in elimination order
+        self.n_symbols = 0
+        self.unsat = False
+        self.n_input_clauses = 0
+        self.n_output_clauses = 0
+
+    def freeze(self, symbols):
+        self.frozen.update(symbols)
+
+    def run(self, clauses, n_symbols) -> ClauseStore:
+        """
+        Simplified formula for `clauses` over symbols 1..n_symbols
+        """
+        assert not self.n_symbols, 'Preprocessor can only run once'
+        store = self._normalize(clauses)
+        self.n_symbols = max(n_symbols, store.max_variable)
+        alive = bytearray(b'\x01') * len(store)
+        occurrences = OccurrenceIndex(store, self.n_symbols)
+        self._propagate(store, alive, occurrences)
+        if self.eliminate and not self.unsat:
+            self._eliminate(store, alive, occurrences)
+        result = ClauseStore()
+        if self.unsat:
+            result.extend([[1], [-1]])
+        else:
+            result.extend([symbol if value else -symbol] for symbol, value in self.values.items() if symbol in self.frozen)
+            # propagation may have made some clauses equal
+            _extend_unique(result, (self._remaining(store, index) for index in range(len(store)) if alive[index]), {})
+        self.n_output_clauses = len(result)
+        return result
+
+    def extend_model(self, model) -> list:
+        """
+        Model of the original formula from a model of the simplified one
+        """
+        values = [False] * (self.n_symbols + 1)
+        for literal in model:
+            if abs(literal) <= self.n_symbols:
+                values[abs(literal)] = literal > 0
+        for symbol, value in self.values.items():
+            values[symbol] = value
+        for symbol, clauses in reversed(self.eliminated):
+            values[symbol] = not all(any(values[abs(literal)] == (literal > 0) for literal in clause if abs(literal) != symbol)
+                                     for clause in clauses)
+        return [symbol if values[symbol] else -symbol for symbol in range(1, self.n_symbols + 1)]
+
+    def log_stat(self):
+        print(f'preprocessing: clauses {self.n_input_clauses} -> {self.n_output_clauses}, fixed symbols: {len(self.values)}, '
+              f'eliminated symbols: {len(self.eliminated)}{", formula is UNSAT" if self.unsat else ""}')
+
+    def _normalize(self, clauses) -> ClauseStore:
+        store = ClauseStore()
+        _extend_unique(store, (clause for clause in map(self._sorted_clause, clauses) if not _is_tautology(clause)), {})
+        return store
+
+    def _sorted_clause(self, clause) -> list:
+        self.n_input_clauses += 1
+        return sorted(set(clause))
+
+    def _remaining(self, store, index) -> list:
+        """
+        Literals of a clause that are not fixed
+        """
+        values = self.values
+        return [literal for literal in store[index] if abs(literal) not in values]
+
+    def _propagate(self, store, alive, occurrences):
+        values = self.values
+        queue = []
+        literals = store.literals
+        # clause lengths come from the offsets, the end of the last clause is the end of the literals
+        for start, end in zip(store.offsets, [*store.offsets[1:], len(literals)]):
+            if end - start == 1:
+                self.unsat = True
+                return
+            if end - start == 2:
+                queue.append(literals[start])
+        while queue:
+            literal = queue.pop()
+            symbol = abs(literal)
+            if symbol in values:
+                if values[symbol] != (literal > 0):
+                    self.unsat = True
+                    return
+                continue
+            values[symbol] = literal > 0
+            for index in occurrences[literal]:
+                alive[index] = 0
+            for index in occurrences[-literal]:
+                if not alive[index]:
+                    continue
+                remaining = self._remaining(store, index)
+                if not remaining:
+                    self.unsat = True
+                    return
+                if len(remaining) == 1:
+                    queue.append(remaining[0])
+
+    def _eliminate(self, store, alive, occurrences):
+        candidates = sorted(
+            (symbol for symbol in range(1, self.n_symbols + 1)
+             if symbol not in self.frozen and symbol not in self.values and occurrences.count(symbol) + occurrences.count(-symbol)),
+            key=lambda symbol: occurrences.count(symbol) * occurrences.count(-symbol),
+        )
+        for symbol in candidates:
+            positive = [index for index in occurrences[symbol] if alive[index]]
+            negative = [index for index in occurrences[-symbol] if alive[index]]
+            if len(positive) * len(negative) > self.elimination_limit:
+                continue
+            positive_clauses = [self._remaining(store, index) for index in positive]
+            negative_clauses = [self._remaining(store, index) for index in negative]
+            resolvents = []
+            for first in positive_clauses:
+                for second in negative_clauses:
+                    resolvent = sorted({literal for literal in first + second if abs(literal) != symbol})
+                    if not _is_tautology(resolvent):
+                        resolvents.append(resolvent)
+            if len(resolvents) > len(positive) + len(negative):
+                continue
+            if any(not resolvent for resolvent in resolvents):
+                self.unsat = True
+                return
+            self.eliminated.append((symbol, positive_clauses))
+            for index in positive + negative:
+                alive[index] = 0
+            for resolvent in resolvents:
+                occurrences.add(len(store), resolvent)
+                store.append(resolvent)
+                alive.append(1)
+
+
+class OccurrenceIndex:
+    """
+    Indices of the clauses of a ClauseStore containing every literal, in the CSR layout: the occurrences of a literal
+    are a slice of one flat array of clause indices, its bounds are in `starts`. Clauses added later
+    (the resolvents of elimination) are indexed in lists
+    """
+    def __init__(self, store, n_symbols):
+        self.n_symbols = n_symbols
+        counts = array('q', bytes(8 * (2 * n_symbols + 3)))
+        for literal, count in Counter(store.literals).items():
+            if literal:
+                counts[self._slot(literal) + 1] = count
+        self.starts = array('q', accumulate(counts))
+        clauses = self.clauses = array('q', bytes(8 * self.starts[-1]))
+        filled = array('q', self.starts)
+        index = 0
+        for literal in store.literals:
+            if literal:
+                slot = 2 * literal if literal > 0 else -2 * literal + 1
+                clauses[filled[slot]] = index
+                filled[slot] += 1
+            else:
+                index += 1
+        self.added = defaultdict(list)  # literal -> [index of an added clause]
+
+    def add(self, index, clause):
+        for literal in clause:
+            self.added[literal].append(index)
+
+    def count(self, literal) -> int:
+        slot = self._slot(literal)
+        return self.starts[slot + 1] - self.starts[slot] + len(self.added.get(literal, ()))
+
+    def __getitem__(self, literal) -> list:
+        slot = self._slot(literal)
+        return self.clauses[self.starts[slot]:self.starts[slot + 1]].tolist() + self.added.get(literal, [])
+
+    @staticmethod
+    def _slot(literal):
+        return 2 * literal if literal > 0 else -2 * literal + 1
+
+
+def _extend_unique(store, clauses, positions):
+    """
+    Adds the clauses that are not in `store` yet, `positions` maps the hash of every clause added so to its index.
+    A clause whose hash is taken by another clause is added anyway, which is rare and harmless
+    """
+    pending = []  # added clauses not in the store yet, they are moved there in batches
+    for clause in clauses:
+        key = hash(tuple(clause))
+        size = len(store) + len(pending)
+        position = positions.setdefault(key, size)
+        if position == size or (store[position] if position < len(store) else pending[position - len(store)]) != clause:
+            pending.append(clause)
+            if len(pending) >= 4096:
+                store.extend(pending)
+                pending = []
+    store.extend(pending)
+
+
+def _is_tautology(sorted_clause) -> bool:
+    symbols = {abs(literal) for literal in sorted_clause}
+    return len(symbols) < len(sorted_clause)
@@ -1,33 +1,102 @@
-from collections import defaultdict
 from itertools import combinations
 
-from engines.sat.logical import exactly_one, equals_value, equal_symbols, if_then
-from universal import Array, FunctionMapping, ChoiceMapping, closure, Renderer
-from utils import incrementing_dict, encouple, all_inputs
+from engines.sat.logical import exactly_one, at_most_one, equals_value, equal_columns, function_output_block, \
+    AT_MOST_ONE_ENCODINGS
+from engines.sat.clauses import ClauseStore
+from engines.sat.symbols import SymbolAllocator
+from universal import Array, FunctionMapping, ChoiceMapping, Circuit, Gate, closure, Renderer
+from utils import encouple
 
 
 class SATRenderer(Renderer):
-    def __init__(self, **kwargs):
+    """
+    `amo_encoding` selects how exactly-one constraints of choices are encoded: one of `logical.AT_MOST_ONE_ENCODINGS`,
+    'native' to pass at-most-one constraints to the solver as cardinality constraints (if it supports them),
+    or 'auto' to use the pairwise encoding up to PAIRWISE_LIMIT symbols and LARGE_AMO_ENCODING above it.
+
+    `choice_encoding` selects how choice mappings are represented: 'combinations' has one symbol per combination
+    of chosen inputs, 'operands' has a one-hot selector of the input for every output (operand) position,
+    with chosen inputs increasing along the operands.
+
+    Clauses are written into `sink` (see `engines.sat.clauses`), by default an in-memory ClauseStore.
+    A SolverSink renders straight into an incremental solver, which is then the only copy of the formula.
+    A DimacsSink made by `BinarySolver.start` renders into the stdin of a running solver binary.
+
+    With `merge_equalities` the variables of an equality are merged (union-find over variables) before they
+    are rendered, so they share one block of symbols and the equality needs no clauses. Variables that already
+    have their own symbols when the equality is rendered are tied by equivalence clauses as before.
+
+    A `preprocessor` (see `engines.sat.preprocessor`) simplifies the formula in `init_solver`, then the formula
+    cannot be extended anymore. Gate selectors and symbols of native cardinality constraints are frozen in it
+    """
+    CHOICE_ENCODINGS = ('combinations', 'operands')
+    PAIRWISE_LIMIT = 6
+    LARGE_AMO_ENCODING = 'sequential'
+    NATIVE_FALLBACK_ENCODING = 'sequential'
+
+    def __init__(self, amo_encoding='auto', choice_encoding='combinations', sink=None, merge_equalities=True, preprocessor=None,
+                 **kwargs):
         super().__init__(**kwargs)
-        self.clauses = []  # [[+-symbol_id]]
-        self.symbols = incrementing_dict()  # symbol -> symbol_id
-        self.vars = defaultdict(list)  # variable_id -> [symbol]
-        self.functions = defaultdict(lambda: defaultdict(list))  # function_id -> (out_index -> [symbol])
-        self.choices = defaultdict(list)  # choice_id -> [symbol]
+        assert amo_encoding in ('auto', 'native', *AT_MOST_ONE_ENCODINGS), f'Unknown at-most-one encoding {amo_encoding}'
+        assert choice_encoding in self.CHOICE_ENCODINGS, f'Unknown choice encoding {choice_encoding}'
+        self.amo_encoding = amo_encoding
+        self.choice_encoding = choice_encoding
+        self.merge_equalities = merge_equalities
+        self.preprocessor = preprocessor
+        self.clauses = sink if sink is not None else ClauseStore()
+        self.cardinalities = []  # [[symbol_id]], at most one of each is true, for the 'native' encoding
+        self.symbols = SymbolAllocator()
+        self.vars = {}  # variable -> range(symbol_id)
+        self.merged = {}  # variable -> variable it was merged into, roots are not in the dict
+        self.functions = {}  # function -> [range(symbol_id) for each out_index]
+        self.choices = {}  # choice -> range(symbol_id), for the 'combinations' choice encoding
+        self.operands = {}  # choice -> [range(symbol_id) for each operand], for the 'operands' choice encoding
+        self.operand_indicators = {}  # choice -> [{input_index: symbol_id} for each operand]
+        self.gate_selectors = {}  # circuit -> [symbol_id for each gate]
 
     def init_variable(self, variable):
-        size = 2 ** len(variable.axes.axes)
-        variable_id = str(variable)
-        symbols = [f'{variable_id}_{i}' for i in range(size)]
-        self.vars[variable_id] = symbols
+        if variable in self.vars:
+            return
+        # if any variable of a merged set has symbols, its root has the same ones
+        root = self._root(variable)
+        if root not in self.vars:
+            size = variable.axes.size
+            self.vars[root] = self.symbols.allocate(size, namer=lambda i: f'{variable}_{i}')
+        self.vars[variable] = self.vars[root]
+
+    def prepare_equality(self, equality, **kwargs):
+        if self.merge_equalities:
+            for var1, var2 in encouple(equality.variables):
+                self._merge(var1, var2)
+
+    def _merge(self, variable1, variable2):
+        root1, root2 = self._root(variable1), self._root(variable2)
+        if root1 is root2 or (root1 in self.vars and root2 in self.vars):
+            return
+        if root1 in self.vars:
+            root1, root2 = root2, root1
+        self.merged[root1] = root2
+
+    def _root(self, variable):
+        path = []
+        while variable in self.merged:
+            path.append(variable)
+            variable = self.merged[variable]
+        for member in path:
+            self.merged[member] = variable
+        return variable
 
     def render_free_variable(self, variable, **kwargs):
         self.init_variable(variable)
-        var_id = str(variable)
-        for symbol, val in zip(self.vars[var_id], [False, True]):
-            self.clauses.append(equals_value(self.symbols[symbol], val))
+        for symbol, val in zip(self.vars[variable], [False, True]):
+            self.clauses.append(equals_value(symbol, val))
         self.mark_rendered(variable)
 
+    def render_constant(self, constant, **kwargs):
+        self.init_variable(constant)
+        self.clauses.append(equals_value(self.vars[constant][0], constant.value))
+        self.mark_rendered(constant)
+
     def render_bound_variable(self, variable, **kwargs):
         # TODO something?
         self.init_variable(variable)
@@ -40,75 +109,252 @@ class SATRenderer(Renderer):
         for each coord of output variable `var` and for each s1..sn from {True, False} (n == input_degree) we have
         (i1 == s1) & (i2 == s2) & .. & (in == sn)  =>  (var == f(s1..sn)), which we rewrite as
         (i1 != s1) | (i2 != s2) | .. | (in != sn) | (var == f(s1..sn)), where (var == f(s1..sn)) is the `statement` and
-        the rest is the precondition
+        the rest is the precondition.
+        Input symbols are gathered into columns over the output axes once, and the whole block is built at once
         """
         self._check_output_correctness(array, FunctionMapping, 'function output')
         self._init_array(array)
-        fun_id = str(array.origin)
-        for var, ind in zip(array.variables, range(array.origin.output_degree)):
-            fun_symbs = self.functions[fun_id][ind]
-            for coord in var.axes:
-                out_symb = self.vars[str(var)][coord.int_value()]
-                for input_values, fun_symb in zip(all_inputs(dim=array.origin.input_degree), fun_symbs):
-                    statement = equal_symbols(self.symbols[out_symb], self.symbols[fun_symb])
-                    precondition = []
-                    for input_var, input_val in zip(array.origin_inputs, input_values):
-                        input_symb = self.vars[str(input_var)][coord.project(input_var.axes).int_value()]
-                        precondition.extend(equals_value(self.symbols[input_symb], input_val))
-                    self.clauses.extend(if_then(precondition, statement))
+        input_columns = self._columns(array.axes, *array.origin_inputs)
+        for var, fun_symbs in zip(array.variables, self.functions[array.origin]):
+            self.clauses.extend(function_output_block(self.vars[var], fun_symbs, input_columns))
         for var in array.variables:
             self.mark_rendered(var)
 
     def render_choice_output(self, array: Array, **kwargs):
         self._check_output_correctness(array, ChoiceMapping, 'choice output')
         self._init_array(array)
-        choice_id = str(array.origin)
-        for inputs, choice_symb in zip(combinations(array.origin_inputs, len(array.variables)), self.choices[choice_id]):
-            for inp, var in zip(inputs, array.variables):
-                equal_cond = self.equal_vars(inp, var)
-                self.clauses.extend(
-                    if_then(
-                        [self.symbols[choice_symb]],
-                        equal_cond,
-                    )
-                )
+        input_columns = self._columns(array.axes, *array.origin_inputs)
+        if array.origin in self.operands:
+            for operand, (selectors, var) in enumerate(zip(self.operands[array.origin], array.variables)):
+                for input_column, selector in zip(input_columns[operand:], selectors):
+                    self.clauses.extend(equal_columns(input_column, self.vars[var], condition=[selector]))
+        else:
+            indices = combinations(range(len(array.origin_inputs)), len(array.variables))
+            for chosen, choice_symb in zip(indices, self.choices[array.origin]):
+                for index, var in zip(chosen, array.variables):
+                    self.clauses.extend(equal_columns(input_columns[index], self.vars[var], condition=[choice_symb]))
         for var in array.variables:
             self.mark_rendered(var)
 
+    def render_gate_output(self, array: Array, **kwargs):
+        """
+        Output of a fused gate: for every pair of inputs the gate can choose, the function block is built
+        straight over the input symbols under the condition that the pair is chosen
+        """
+        self._check_output_correctness(array, Gate, 'gate output')
+        self._init_array(array)
+        gate = array.origin
+        input_columns = self._columns(array.axes, *array.origin_inputs)
+        out_column = self.vars[array.variables[0]]
+        fun_symbs = self.functions[gate.function][0]
+        if gate.choice in self.operands:
+            first, second = self.operands[gate.choice]
+            for i, first_selector in enumerate(first):
+                # the second operand of the pair (i, j) is input j, its selector is the (j - 1)-th one
+                for j in range(i + 1, len(input_columns)):
+                    self.clauses.extend(function_output_block(
+                        out_column, fun_symbs, [input_columns[i], input_columns[j]], condition=[first_selector, second[j - 1]],
+                    ))
+        else:
+            pairs = combinations(range(len(array.origin_inputs)), 2)
+            for (i, j), choice_symb in zip(pairs, self.choices[gate.choice]):
+                self.clauses.extend(function_output_block(
+                    out_column, fun_symbs, [input_columns[i], input_columns[j]], condition=[choice_symb],
+                ))
+        self.mark_rendered(array.variables[0])
+
     def render_function_mapping(self, function: FunctionMapping, **kwargs):
-        fun_id = str(function)
-        for out_ind in range(function.output_degree):
-            for input_id, input in enumerate(all_inputs(function.input_degree)):
-                symbol = f'{fun_id}_{out_ind}_{input_id}'
-                self.functions[fun_id][out_ind].append(symbol)
-                symbol_id = self.symbols[symbol]
-                if input in function.values[out_ind]:
-                    self.clauses.append(equals_value(symbol_id, function.values[out_ind][input]))
+        stride = 2 ** function.input_degree
+        block = self.symbols.allocate(
+            function.output_degree * stride,
+            namer=lambda i: f'{function}_{i // stride}_{i % stride}',
+        )
+        self.functions[function] = [block[out_ind * stride:(out_ind + 1) * stride] for out_ind in range(function.output_degree)]
+        for out_ind, symbols in enumerate(self.functions[function]):
+            self.clauses.extend(equals_value(symbols[index], value) for index, value in function.values.items(out_ind))
         self.mark_rendered(function)
 
     def render_choice_mapping(self, choice: ChoiceMapping, **kwargs):
-        choice_id = str(choice)
-        for indices in combinations(range(choice.input_degree), choice.output_degree):
-            self.choices[choice_id].append(f'{choice_id}_{"_".join(map(str, indices))}')
-        self.clauses.extend(
-            exactly_one([self.symbols[symbol] for symbol in self.choices[choice_id]])
-        )
+        if self.choice_encoding == 'operands':
+            self.render_operand_choice_mapping(choice, **kwargs)
+        else:
+            self.render_combination_choice_mapping(choice, **kwargs)
         self.mark_rendered(choice)
 
+    def render_combination_choice_mapping(self, choice: ChoiceMapping, **kwargs):
+        all_indices = list(combinations(range(choice.input_degree), choice.output_degree))
+        self.choices[choice] = self.symbols.allocate(
+            len(all_indices),
+            namer=lambda i: f'{choice}_{"_".join(map(str, all_indices[i]))}',
+        )
+        self.clauses.extend(self._exactly_one(list(self.choices[choice])))
+
+    def render_operand_choice_mapping(self, choice: ChoiceMapping, **kwargs):
+        """
+        Operand `p` may only choose inputs p..input_degree - output_degree + p, so that the chosen inputs can increase.
+        Choosing input `i` for operand `p` implies choosing an input greater than `i` for operand `p + 1`
+        """
+        width = choice.input_degree - choice.output_degree + 1
+        block = self.symbols.allocate(
+            choice.output_degree * width,
+            namer=lambda i: f'{choice}_{i // width}_{i // width + i % width}',
+        )
+        self.operands[choice] = [block[operand * width:(operand + 1) * width] for operand in range(choice.output_degree)]
+        for selectors in self.operands[choice]:
+            self.clauses.extend(self._exactly_one(list(selectors)))
+        for selectors, next_selectors in encouple(self.operands[choice]):
+            # input `start + i` for the operand is `start + 1 + i` for the next one
+            for i, selector in enumerate(selectors):
+                self.clauses.append([-selector, *next_selectors[i:]])
+
+    def render_gate_selectors(self, circuit: Circuit, **kwargs) -> list:
+        """
+        One symbol per gate, a circuit output may use a gate only if the gate's symbol is true.
+        Assuming the symbols of gates k.. to be false leaves a circuit of the first k gates
+        """
+        assert self.is_rendered(circuit.choice), f'Output choice of {circuit} must be rendered before the gate selectors'
+        selectors = self.symbols.allocate(len(circuit.gates), namer=lambda i: f'{circuit.gates[i]}_enabled')
+        for gate_index, selector in enumerate(selectors):
+            for choice_symb in self._choice_symbols_using(circuit.choice, circuit.input_degree + gate_index):
+                self.clauses.append([selector, -choice_symb])
+        self.gate_selectors[circuit] = list(selectors)
+        return list(selectors)
+
+    def render_symmetry_breaking(self, circuit: Circuit, **kwargs):
+        options = circuit.symmetry_breaking
+        if 'ordered' in options:
+            for gate_index in range(len(circuit.gates) - 1):
+                self._render_ordered_gates(circuit, gate_index)
+        if 'non_trivial' in options:
+            for gate in circuit.gates:
+                self._render_non_trivial_gate(gate)
+        if 'all_used' in options:
+            for gate_index in range(len(circuit.gates)):
+                self._render_used_gate(circuit, gate_index)
+        if 'normal' in options:
+            for gate_index in range(len(circuit.gates)):
+                self._render_normal_gate(circuit, gate_index)
+
+    def _render_ordered_gates(self, circuit, gate_index):
+        """
+        Gate `gate_index + 1` either uses gate `gate_index` or has a lexicographically greater or equal pair of inputs.
+        Adjacent gates that do not depend on each other can be swapped, so this keeps every circuit representable
+        """
+        gate, next_gate = circuit.gates[gate_index], circuit.gates[gate_index + 1]
+        firsts, seconds = self._operand_indicators(gate.choice)
+        next_firsts, next_seconds = self._operand_indicators(next_gate.choice)
+        uses_gate = self._choice_symbols_using(next_gate.choice, circuit.input_degree + gate_index)
+        for first, first_symb in firsts.items():
+            not_less = [symb for index, symb in next_firsts.items() if index >= first]
+            self.clauses.append([-first_symb, *uses_gate, *not_less])
+            if first not in next_firsts:
+                continue
+            for second, second_symb in seconds.items():
+                not_less = [symb for index, symb in next_seconds.items() if index >= second]
+                self.clauses.append([-first_symb, -next_firsts[first], -second_symb, *uses_gate, *not_less])
+
+    def _render_non_trivial_gate(self, gate):
+        assert gate.function.input_degree == 2 and gate.function.output_degree == 1, 'Gate function must be 2 -> 1'
+        table_symbs = self.functions[gate.function][0]
+        # rows are 00, 01, 10, 11: constants and projections on either input, negations of the inputs are allowed
+        for table in ((0, 0, 0, 0), (1, 1, 1, 1), (0, 0, 1, 1), (0, 1, 0, 1)):
+            self.clauses.append([-symb if value else symb for symb, value in zip(table_symbs, table)])
+
+    def _render_used_gate(self, circuit, gate_index):
+        input_index = circuit.input_degree + gate_index
+        used_by = self._choice_symbols_using(circuit.choice, input_index)
+        for later_gate in circuit.gates[gate_index + 1:]:
+            used_by.extend(self._choice_symbols_using(later_gate.choice, input_index))
+        if circuit in self.gate_selectors:
+            # disabled gates may stay unused
+            used_by.append(-self.gate_selectors[circuit][gate_index])
+        self.clauses.append(used_by)
+
+    def _render_normal_gate(self, circuit, gate_index):
+        """
+        A gate which is not an output can be replaced by its negation, adjusting the functions of the gates using it
+        """
+        zero_row_symb = self.functions[circuit.gates[gate_index].function][0][0]
+        is_output = self._choice_symbols_using(circuit.choice, circuit.input_degree + gate_index)
+        self.clauses.append([-zero_row_symb, *is_output])
+
+    def _operand_indicators(self, choice) -> list:
+        """
+        For each operand, {input_index: symbol} where the symbol is true iff the operand is the input
+        """
+        if choice in self.operands:
+            return [
+                {operand + i: symb for i, symb in enumerate(selectors)}
+                for operand, selectors in enumerate(self.operands[choice])
+            ]
+        if choice not in self.operand_indicators:
+            width = choice.input_degree - choice.output_degree + 1
+            block = self.symbols.allocate(
+                choice.output_degree * width,
+                namer=lambda i: f'{choice}_operand_{i // width}_{i // width + i % width}',
+            )
+            indicators = [
+                {operand + i: symb for i, symb in enumerate(block[operand * width:(operand + 1) * width])}
+                for operand in range(choice.output_degree)
+            ]
+            implied_by = [{index: [] for index in operand_indicators} for operand_indicators in indicators]
+            all_indices = combinations(range(choice.input_degree), choice.output_degree)
+            for choice_symb, indices in zip(self.choices[choice], all_indices):
+                for operand, index in enumerate(indices):
+                    self.clauses.append([-choice_symb, indicators[operand][index]])
+                    implied_by[operand][index].append(choice_symb)
+            for operand_indicators, operand_implied_by in zip(indicators, implied_by):
+                for index, symb in operand_indicators.items():
+                    self.clauses.append([-symb, *operand_implied_by[index]])
+            self.operand_indicators[choice] = indicators
+        return self.operand_indicators[choice]
+
+    def _choice_symbols_using(self, choice, input_index):
+        """
+        Choice symbols that select the input `input_index`
+        """
+        if choice in self.operands:
+            return [
+                selectors[input_index - operand]
+                for operand, selectors in enumerate(self.operands[choice])
+                if 0 <= input_index - operand < len(selectors)
+            ]
+        all_indices = combinations(range(choice.input_degree), choice.output_degree)
+        return [symbol for symbol, indices in zip(self.choices[choice], all_indices) if input_index in indices]
+
     def set_equal(self, *variables, **kwargs):
-        self.clauses.extend(self.equal_vars(*variables))
+        if any(self.vars[var] != self.vars[variables[0]] for var in variables):
+            self.clauses.extend(self.equal_vars(*variables))
 
     def equal_vars(self, *variables):
         result = []
-        for var in variables:
-            assert str(var) in self.vars, f'Variable {var} is not initialized'
         axes = closure(*[var.axes for var in variables])
-        for coord in axes:
-            symbs = [self.vars[str(var)][coord.project(var.axes).int_value()] for var in variables]
-            for symb1, symb2 in encouple(symbs):
-                result.extend(equal_symbols(self.symbols[symb1], self.symbols[symb2]))
+        for column1, column2 in encouple(self._columns(axes, *variables)):
+            result.extend(equal_columns(column1, column2))
+        return result
+
+    def _columns(self, axes, *variables):
+        """
+        Symbols of each variable at every point of `axes`, gathered through the projection tables
+        """
+        result = []
+        for var in variables:
+            assert var in self.vars, f'Variable {var} is not initialized'
+            result.append(list(map(self.vars[var].__getitem__, axes.projection(var.axes))))
         return result
 
+    def _exactly_one(self, symbols):
+        encoding = self.amo_encoding
+        if encoding == 'auto':
+            encoding = 'pairwise' if len(symbols) <= self.PAIRWISE_LIMIT else self.LARGE_AMO_ENCODING
+        if encoding == 'native':
+            self.cardinalities.append(symbols)
+            return [symbols]
+        return exactly_one(symbols, encoding=encoding, new_symbols=self._new_symbols)
+
+    def _new_symbols(self, n):
+        return list(self.symbols.allocate(n))
+
     def _check_output_correctness(self, array, correct_mapping_cls, output_name='mapping output'):
         assert isinstance(array.origin, correct_mapping_cls), \
             f'Trying to render {output_name} while origin is not a {correct_mapping_cls.__name__}, but a {type(array.origin)}'
@@ -117,12 +363,38 @@ class SATRenderer(Renderer):
 
     def _init_array(self, array):
         for var in array.variables:
-            if str(var) not in self.vars:
-                self.init_variable(var)
+            self.init_variable(var)
+
+    def init_solver(self, solver, start=0):
+        """
+        Gives `solver` the clauses starting from the `start`-th one, so an incremental solver can get only the new ones
+        """
+        if self.cardinalities:
+            if getattr(solver, 'supports_atmost', lambda: False)():
+                for symbols in self.cardinalities:
+                    solver.add_atmost(symbols, 1)
+                    if self.preprocessor is not None:
+                        self.preprocessor.freeze(symbols)
+            else:
+                for symbols in self.cardinalities:
+                    self.clauses.extend(at_most_one(symbols, self.NATIVE_FALLBACK_ENCODING, new_symbols=self._new_symbols))
+            self.cardinalities = []
+        if self.preprocessor is None:
+            self.clauses.feed(solver, start=start)
+            return
+        assert start == 0, 'Preprocessed formula cannot be extended'
+        assert isinstance(self.clauses, ClauseStore), 'Preprocessing requires the clauses to be kept in a ClauseStore'
+        for selectors in self.gate_selectors.values():
+            self.preprocessor.freeze(selectors)
+        self.preprocessor.run(self.clauses, len(self.symbols)).feed(solver)
+
+    def size_counters(self) -> dict:
+        return {'clauses': len(self.clauses), 'symbols': len(self.symbols)}
 
-    def init_solver(self, solver):
-        for clause in self.clauses:
-            solver.add_clause(clause)
+    def symbol_name(self, symbol_id) -> str:
+        return self.symbols.name(symbol_id)
 
     def log_stat(self):
         print(f'variables: {len(self.vars)}, symbols: {len(self.symbols)}, clauses: {len(self.clauses)}')
+        if self.preprocessor is not None and self.preprocessor.n_symbols:
+            self.preprocessor.log_stat()
@@ -0,0 +1,34 @@
+from bisect import bisect_right
+
+
+class SymbolAllocator:
+    """
+    Hands out contiguous ranges of symbol ids, one range per rendered variable / function output / choice.
+    A range is an offset plus a stride, so rendering and decoding only do integer arithmetic.
+    Human-readable names are built lazily by `name` for debugging purposes only
+    """
+    def __init__(self, start=1):
+        self._start = start
+        self._next = start
+        self._offsets = []  # [block offset], sorted
+        self._namers = []  # [index -> str]
+
+    def allocate(self, size, namer=None) -> range:
+        block = range(self._next, self._next + size)
+        self._offsets.append(self._next)
+        self._namers.append(namer)
+        self._next += size
+        return block
+
+    def name(self, symbol) -> str:
+        symbol = abs(symbol)
+        assert self._start <= symbol < self._next, f'Symbol {symbol} is not allocated'
+        block_index = bisect_right(self._offsets, symbol) - 1
+        namer = self._namers[block_index]
+        index = symbol - self._offsets[block_index]
+        if namer is None:
+            return f'symbol_{symbol}'
+        return namer(index)
+
+    def __len__(self):
+        return self._next - self._start
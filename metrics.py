@@ -0,0 +1,124 @@
+import json
+import sys
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter, process_time
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+
+def max_rss():
+    """
+    Peak resident set size of the process in bytes, None where it is unknown
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux and the BSDs
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class Metrics:
+    """
+    Measurements of one builder run:
+        `phases` -- records of the timed phases: wall and CPU time, peak RSS of the process so far (see `max_rss`) and,
+            with `trace_memory`, the peak of the memory allocated by Python during the phase (tracemalloc, slow)
+        `counters` -- {group: {key: value}}, e.g. clauses and symbols made by every type of renderable
+        `solver_stats` -- statistics reported by the solver
+        `info` -- anything else describing the run (parameters, totals)
+    `callback` is called with every finished phase record and with the whole report in `finish`
+    """
+    def __init__(self, trace_memory=False, callback=None):
+        self.trace_memory = trace_memory
+        self.callback = callback
+        self.phases = []
+        self.counters = defaultdict(lambda: defaultdict(int))
+        self.solver_stats = {}
+        self.info = {}
+
+    @contextmanager
+    def phase(self, name):
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        start_wall, start_cpu = perf_counter(), process_time()
+        try:
+            yield
+        finally:
+            record = {
+                'type': 'phase',
+                'name': name,
+                'wall': perf_counter() - start_wall,
+                'cpu': process_time() - start_cpu,
+                'max_rss': max_rss(),
+            }
+            if self.trace_memory:
+                record['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+            self.phases.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    def count(self, group, key, value=1):
+        self.counters[group][key] += value
+
+    def report(self) -> dict:
+        return {
+            'type': 'report',
+            'info': self.info,
+            'phases': self.phases,
+            'counters': {group: dict(values) for group, values in self.counters.items()},
+            'solver_stats': self.solver_stats,
+        }
+
+    def finish(self):
+        if self.callback is not None:
+            self.callback(self.report())
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.report(), **kwargs)
+
+
+class RenderAccounting:
+    """
+    Attributes the growth of a renderer's size counters (see `Renderer.size_counters`) to the renderables being rendered.
+    Renders may be nested, every increase goes to the innermost renderable, the increases outside of any renderable
+    go to 'other'. Counts are kept in `metrics.counters[counter name]` by `renderable_kind`.
+    It is given to the renderer with `Renderer.set_accounting`
+    """
+    OTHER = 'other'
+
+    def __init__(self, renderer, metrics):
+        self.renderer = renderer
+        self.metrics = metrics
+        self.stack = [self.OTHER]
+        self.last = renderer.size_counters()
+
+    def enter(self, renderable):
+        self.flush()
+        self.stack.append(renderable_kind(renderable))
+
+    def exit(self):
+        self.flush()
+        self.stack.pop()
+
+    def flush(self):
+        current = self.renderer.size_counters()
+        for name, value in current.items():
+            if value != self.last.get(name, 0):
+                self.metrics.count(name, self.stack[-1], value - self.last.get(name, 0))
+        self.last = current
+
+
+def renderable_kind(renderable) -> str:
+    origin = getattr(renderable, 'origin', None)
+    if origin is not None:
+        return f'{type(origin).__name__} output'
+    return type(renderable).__name__
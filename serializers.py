@@ -1,6 +1,6 @@
 from collections import defaultdict
 
-from universal import GateResult, CircuitResult
+from universal import ChoiceMappingResult, FunctionMappingResult, GateResult, CircuitResult
 
 
 truthtable_decoder = defaultdict(lambda: ('', '*', ''))
@@ -18,7 +18,7 @@ truthtable_decoder['1001'] = ('', '==', '')
 
 def get_truthtable(fun_result):
     assert fun_result.input_degree == 2 and fun_result.output_degree == 1, 'Function must be 2 -> 1'
-    return ''.join(map(str, map(int, map(lambda p: p[1], sorted(fun_result.values[0].items())))))
+    return ''.join('1' if fun_result.values[0, index] else '0' for index in range(4))
 
 
 def serialize_gate(gate_result: GateResult):
@@ -47,3 +47,45 @@ def serialize_circuit(circuit_result: CircuitResult, sep='\n'):
     )
     result.append('=====================================')
     return sep.join(result)
+
+
+def function_to_dict(fun_result: FunctionMappingResult) -> dict:
+    return {
+        'input_degree': fun_result.input_degree,
+        'output_degree': fun_result.output_degree,
+        'columns': [hex(fun_result.values.column(index)) for index in range(fun_result.output_degree)],
+    }
+
+
+def function_from_dict(data: dict) -> FunctionMappingResult:
+    fun_result = FunctionMappingResult(input_degree=data['input_degree'], output_degree=data['output_degree'])
+    for index, column in enumerate(data['columns']):
+        fun_result.set_column(output_index=index, column=int(column, 16))
+    return fun_result
+
+
+def circuit_to_dict(circuit_result: CircuitResult) -> dict:
+    """
+    Plain data (for JSON) of a circuit: every gate is its pair of inputs and its truth table
+    """
+    return {
+        'input_degree': circuit_result.input_degree,
+        'gates': [
+            {'inputs': list(gate_result.choice_result.choices), 'truthtable': get_truthtable(gate_result.function_result)}
+            for gate_result in circuit_result.gate_results
+        ],
+        'outputs': list(circuit_result.choice_result.choices),
+    }
+
+
+def circuit_from_dict(data: dict) -> CircuitResult:
+    input_degree = data['input_degree']
+    gate_results = []
+    for index, gate in enumerate(data['gates']):
+        function_result = FunctionMappingResult(input_degree=2, output_degree=1)
+        function_result.set_column(output_index=0, column=int(gate['truthtable'][::-1], 2))
+        choice_result = ChoiceMappingResult(tuple(gate['inputs']), input_degree=input_degree + index, output_degree=2)
+        gate_results.append(GateResult(choice_result=choice_result, function_result=function_result))
+    choice_result = ChoiceMappingResult(tuple(data['outputs']), input_degree=input_degree + len(gate_results),
+                                        output_degree=len(data['outputs']))
+    return CircuitResult(gate_results=gate_results, choice_result=choice_result)
@@ -0,0 +1,136 @@
+"""
+Bit-sliced evaluation of decoded circuits. A column holds the values of a wire on many rows at once as a Python int:
+bit `r` is the value on row `r`. On the full input space rows are in `all_inputs` order,
+so input `j` of `n` is bit `n - 1 - j` of the row index
+"""
+
+from universal import CircuitResult
+from computers import FunctionTemplate
+
+
+def full_mask(n_rows) -> int:
+    return (1 << n_rows) - 1
+
+
+def input_columns(input_degree) -> list:
+    """
+    Columns of the inputs over all 2^input_degree rows
+    """
+    n_rows = 2 ** input_degree
+    columns = []
+    for j in range(input_degree):
+        period = 1 << (input_degree - 1 - j)
+        # `period` zero rows and `period` one rows, repeated by doubling
+        column = full_mask(period) << period
+        width = 2 * period
+        while width < n_rows:
+            column |= column << width
+            width *= 2
+        columns.append(column)
+    return columns
+
+
+def pack_rows(rows) -> list:
+    """
+    Columns of a batch of input vectors, bit `r` of the `j`-th column is the `j`-th value of the `r`-th vector
+    """
+    rows = list(rows)
+    columns = [0] * (len(rows[0]) if rows else 0)
+    for r, row in enumerate(rows):
+        for j, value in enumerate(row):
+            if value:
+                columns[j] |= 1 << r
+    return columns
+
+
+def row_inputs(row, input_degree) -> tuple:
+    """
+    Input vector of the `row`-th row of the full input space
+    """
+    return tuple(bool(row >> (input_degree - 1 - j) & 1) for j in range(input_degree))
+
+
+def set_bits(mask, limit=None):
+    """
+    Indices of the set bits of `mask` in increasing order, at most `limit` of them
+    """
+    found = 0
+    while mask and (limit is None or found < limit):
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+        found += 1
+
+
+class Simulator:
+    """
+    A CircuitResult compiled into a schedule of gates, every gate is (left wire, right wire, truth table).
+    Gates the outputs do not depend on are dropped
+    """
+    def __init__(self, circuit_result: CircuitResult):
+        self.input_degree = circuit_result.input_degree
+        self.output_degree = circuit_result.output_degree
+        used = circuit_result.used_gates()
+        # wires are renumbered so that the dropped gates leave no gaps
+        positions = {self.input_degree + gate_index: self.input_degree + position for position, gate_index in enumerate(used)}
+        self.schedule = []
+        for gate_index in used:
+            gate_result = circuit_result.gate_results[gate_index]
+            left, right = (positions.get(choice, choice) for choice in gate_result.choice_result.choices)
+            table = tuple(gate_result.function_result.values.row(row)[0] for row in range(4))
+            self.schedule.append((left, right, table))
+        self.outputs = [positions.get(choice, choice) for choice in circuit_result.choice_result.choices]
+
+    def run(self, columns, n_rows) -> list:
+        """
+        Output columns for input `columns` of `n_rows` rows
+        """
+        assert len(columns) == self.input_degree, f'Wrong input size: {len(columns)} instead of {self.input_degree}'
+        mask = full_mask(n_rows)
+        values = list(columns)
+        for left, right, (t00, t01, t10, t11) in self.schedule:
+            a, b = values[left], values[right]
+            value = 0
+            if t00:
+                value |= ~(a | b)
+            if t01:
+                value |= ~a & b
+            if t10:
+                value |= a & ~b
+            if t11:
+                value |= a & b
+            values.append(value & mask)
+        return [values[output] for output in self.outputs]
+
+    def truthtable(self) -> list:
+        """
+        Output columns over the whole input space
+        """
+        return self.run(input_columns(self.input_degree), 2 ** self.input_degree)
+
+    def evaluate(self, rows) -> list:
+        """
+        Outputs for a batch of input vectors
+        """
+        rows = list(rows)
+        columns = self.run(pack_rows(rows), len(rows)) if rows else []
+        return [[bool(column >> r & 1) for column in columns] for r in range(len(rows))]
+
+
+def mismatches(circuit_result: CircuitResult, template: FunctionTemplate, expected=None) -> int:
+    """
+    Mask of the rows of the full input space on which the circuit differs from the template.
+    `expected` are the template columns, if they are already computed
+    """
+    assert circuit_result.input_degree == template.input_degree and circuit_result.output_degree == template.output_degree, \
+        'Circuit and template have different degrees'
+    if expected is None:
+        expected = template.columns()
+    result = 0
+    for actual, true in zip(Simulator(circuit_result).truthtable(), expected):
+        result |= actual ^ true
+    return result
+
+
+def verify(circuit_result: CircuitResult, template: FunctionTemplate, expected=None) -> bool:
+    return not mismatches(circuit_result, template, expected=expected)
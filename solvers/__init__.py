@@ -1,7 +1,8 @@
 from engines import SATEngine
 from solvers.sat import Solver
+from solvers.portfolio import PortfolioSolver
 
 
 AVAILABLE_SOLVERS = {
-    SATEngine: [Solver],
+    SATEngine: [Solver, PortfolioSolver],
 }
\ No newline at end of file
@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import queue
+import signal
+from functools import partial
+from traceback import format_exc
+
+from solvers.sat import BufferedSolver, SolveStatuses
+try:
+    from pysat.solvers import Solver
+except ImportError:
+    Solver = None
+
+
+class PortfolioSolver(BufferedSolver):
+    """
+    Runs several backends on the same formula at once, one process per backend, and takes the first answer.
+    A backend is a callable returning a fresh solver with `append_formula`/`solve`/`get_model`,
+    e.g. `partial(Solver, name='cd')` or `partial(Syrup, max_threads=8)`.
+    Workers are forked, so the clause buffer is shared with them copy-on-write instead of being sent over
+    """
+    DEFAULT_BACKENDS = ['cadical153', 'glucose4', 'maplechrono']
+    POLL_INTERVAL = 0.5  # seconds between checks that the workers are alive
+
+    def __init__(self, backends=None):
+        super().__init__()
+        if backends is None:
+            assert Solver is not None, 'pysat is required for the default portfolio'
+            backends = [partial(Solver, name=name) for name in self.DEFAULT_BACKENDS]
+        assert backends, 'Portfolio must have at least one backend'
+        self.backends = list(backends)
+        self.winner = None  # index of the backend that answered
+
+    def solve(self):
+        assert 'fork' in multiprocessing.get_all_start_methods(), 'Portfolio solving requires the fork start method'
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        workers = [
+            context.Process(target=_run_backend, args=(index, backend, self.clauses, results), daemon=True)
+            for index, backend in enumerate(self.backends)
+        ]
+        self.status = SolveStatuses.NOT_RAN
+        self.model = None
+        self.winner = None
+        for worker in workers:
+            worker.start()
+        try:
+            errors = {}  # index -> error
+            while len(errors) < len(workers):
+                try:
+                    index, status, model, error = results.get(timeout=self.POLL_INTERVAL)
+                except queue.Empty:
+                    # a worker killed by a signal (e.g. by the OOM killer) never reports
+                    for index, worker in enumerate(workers):
+                        if index not in errors and not worker.is_alive() and results.empty():
+                            errors[index] = f'Backend {index} died with exit code {worker.exitcode}'
+                    continue
+                if error is not None:
+                    errors[index] = error
+                    continue
+                self.winner = index
+                self.status = status
+                self.model = model
+                break
+            else:
+                raise RuntimeError('All portfolio backends failed:\n' + '\n'.join(errors.values()))
+        finally:
+            for worker in workers:
+                _kill(worker)
+            results.close()
+        return self.status is SolveStatuses.SAT
+
+
+def _run_backend(index, backend, clauses, results):
+    # own process group, so that the solver binaries started by the backend are killed together with it
+    os.setpgrp()
+    try:
+        solver = backend()
+        solver.append_formula(clauses)
+        answer = solver.solve()
+        status = solver.status if isinstance(solver, BufferedSolver) else _answer_status(answer)
+        if status not in (SolveStatuses.SAT, SolveStatuses.UNSAT):
+            raise RuntimeError(f'Backend {index} gave no answer, its status is {status}')
+        model = solver.get_model() if status is SolveStatuses.SAT else None
+        results.put((index, status, model, None))
+    except Exception:
+        results.put((index, None, None, f'Backend {index} failed: {format_exc()}'))
+
+
+def _answer_status(answer):
+    # pysat solvers answer True or False, or None if the search was interrupted
+    if answer is True or answer is False:
+        return SolveStatuses.SAT if answer else SolveStatuses.UNSAT
+    return SolveStatuses.NOT_RAN
+
+
+def _kill(worker):
+    if worker.is_alive():
+        try:
+            os.killpg(worker.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            # the worker has not created its process group yet
+            worker.kill()
+    worker.join()
@@ -1,6 +1,10 @@
 import subprocess
 import os
 import enum
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+from engines.sat.clauses import ClauseStore, DimacsSink, DIMACS_CHUNK_SIZE
 try:
     from pysat.solvers import *
 except ImportError:
@@ -13,35 +17,138 @@ class SolveStatuses(enum.Enum):
     UNSAT = enum.auto()
 
 
-class BinarySolver:
-    def __init__(self, path):
-        self.path = path
-        self.clauses = []
-        self.options = []
+class BufferedSolver:
+    """
+    Solver that collects the clauses itself and hands them to the actual solving backend(s) in `solve`.
+    A ClauseStore given to an empty solver is shared instead of copied: before adding clauses of its own the solver
+    copies the clauses the store had when it was given, so the solver never changes the store
+    """
+    def __init__(self):
+        self.clauses = ClauseStore()
+        self.n_shared = None  # number of clauses of the shared store that belong to the solver, None if not shared
         self.status = SolveStatuses.NOT_RAN
         self.model = None
 
     def add_clause(self, clause):
+        self._own_clauses()
         self.clauses.append(clause)
 
-    def add_option(self, option):
-        self.options.append(option)
+    def append_formula(self, formula):
+        if isinstance(formula, ClauseStore) and not len(self.clauses):
+            self.clauses = formula
+            self.n_shared = len(formula)
+        else:
+            self._own_clauses()
+            self.clauses.extend(formula)
+
+    def _own_clauses(self):
+        if self.n_shared is not None:
+            self.clauses = self.clauses.copy(self.n_shared)
+            self.n_shared = None
 
     def get_model(self):
         return self.model
 
     def solve(self):
-        self.prepare()
-        input_path = self._get_tmp_path()
-        self._write_clauses(input_path)
-        out_path = 'out.sat'
-        cmd = [self.path]
-        for option in self.options:
-            cmd.append(option)
-        cmd.extend([input_path, out_path])
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
-        for line in iter(proc.stdout.readline, b''):
-            # print(line.decode(), end='')
+        raise NotImplementedError
+
+
+class BinarySolver(BufferedSolver):
+    """
+    Runs a solver binary on DIMACS. Besides the collected clauses, the solver can run on a formula written
+    by a DimacsSink (see `use_dimacs`): a file given as the input argument, or its own stdin opened by `start`,
+    so the binary loads the formula while it is being rendered
+    """
+    def __init__(self, path, stream_input=False):
+        super().__init__()
+        self.path = path
+        self.stream_input = stream_input  # pipe DIMACS to the solver's stdin instead of writing a file
+        self.options = []
+        self.prepared = False
+        self.input_path = None  # DIMACS file to solve instead of the collected clauses
+        self.process = None  # solver started by `start`, reading its stdin
+        self.output = []  # output lines of the started solver
+        self.reader = None
+
+    def add_option(self, option):
+        self.options.append(option)
+
+    def start(self, n_variables, n_clauses, chunk_size=DIMACS_CHUNK_SIZE) -> DimacsSink:
+        """
+        Starts the solver on its stdin and returns a sink writing to it, the numbers of variables and clauses
+        must be known up front, e.g. from a dry run into a CountingSink. `solve` waits for the answer
+        """
+        assert self.process is None, 'Solver is already started'
+        self.process = subprocess.Popen(self._command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        # output is read meanwhile, so that the solver never blocks on it while the formula is written
+        self.output = []
+        self.reader = Thread(target=lambda: self.output.extend(iter(self.process.stdout.readline, b'')))
+        self.reader.start()
+        return DimacsSink(self.process.stdin, chunk_size=chunk_size, n_variables=n_variables, n_clauses=n_clauses)
+
+    def use_dimacs(self, sink: DimacsSink):
+        """
+        Makes the solver solve the formula written by `sink`: its stdin if the sink was made by `start`,
+        otherwise the file the sink wrote
+        """
+        sink.close()
+        if self.process is not None and sink.stream is self.process.stdin:
+            return
+        assert isinstance(getattr(sink.stream, 'name', None), str), 'Sink must write to the stdin of the solver or to a file'
+        self.input_path = sink.stream.name
+
+    def solve(self):
+        """
+        Every run works in its own temporary directory (or only through pipes with `stream_input`),
+        so any number of solves can run concurrently from the same working directory
+        """
+        self.status = SolveStatuses.NOT_RAN
+        self.model = None
+        if self.process is not None:
+            return self._finish_started()
+        cmd = self._command()
+        with TemporaryDirectory(prefix='circuits-') as tmp_dir:
+            if self.stream_input and self.input_path is None:
+                proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                writer = Thread(target=self._stream_clauses, args=(proc.stdin,))
+                writer.start()
+            else:
+                input_path = self.input_path
+                if input_path is None:
+                    input_path = os.path.join(tmp_dir, 'input.cnf')
+                    self._write_clauses(input_path)
+                out_path = os.path.join(tmp_dir, 'output.sat')
+                cmd.extend([input_path, out_path])
+                proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+                writer = None
+            self._parse_output(iter(proc.stdout.readline, b''))
+            proc.stdout.close()
+            proc.wait()
+            if writer is not None:
+                writer.join()
+        return self.status is SolveStatuses.SAT
+
+    def _finish_started(self):
+        if not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        self.reader.join()
+        self.process.stdout.close()
+        self.process.wait()
+        self.process = None
+        self._parse_output(self.output)
+        return self.status is SolveStatuses.SAT
+
+    def _command(self):
+        if not self.prepared:
+            self.prepare()
+            self.prepared = True
+        return [self.path, *self.options]
+
+    def _parse_output(self, lines):
+        for line in lines:
             if line.startswith(b's'):
                 if line.find(b'UNSAT') >= 0:
                     self.status = SolveStatuses.UNSAT
@@ -49,25 +156,18 @@ class BinarySolver:
                     self.status = SolveStatuses.SAT
             if line.startswith(b'v'):
                 self.model = list(map(int, line.rstrip()[2:-2].split()))
-        os.remove(input_path)
-        return self.status is SolveStatuses.SAT
 
-    def _write_clauses(self, tmp_path='tmp.sat'):
-        n = self._compute_variables()
-        m = len(self.clauses)
-        with open(tmp_path, 'w') as file:
-            file.write(f'p cnf {n} {m}\n')
-            for clause in self.clauses:
-                file.write(f'{" ".join(map(str, clause))} 0\n')
-
-    def _compute_variables(self):
-        vars = set()
-        for clause in self.clauses:
-            vars.update((-v if v < 0 else v for v in clause))
-        return len(vars)
-
-    def _get_tmp_path(self):
-        return 'tmp.sat'
+    def _write_clauses(self, path):
+        with open(path, 'wb') as file:
+            self.clauses.write_dimacs(file)
+
+    def _stream_clauses(self, stdin):
+        try:
+            self.clauses.write_dimacs(stdin)
+            stdin.close()
+        except BrokenPipeError:
+            # the solver has exited before reading the whole formula, its output tells what happened
+            pass
 
     def prepare(self):
         pass
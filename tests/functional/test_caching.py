@@ -0,0 +1,78 @@
+from builders import SimpleBuilder, MinimizingBuilder, RecurseBuilder
+from cache import SynthesisCache
+from engines import SATEngine
+from computers import mod_value_computer, mod_n_k_computer, mod_n_comb_computer
+from serializers import circuit_to_dict, function_to_dict
+from solvers.sat import Solver
+
+
+def test_cache_hit_skips_rendering():
+    cache = SynthesisCache(':memory:')
+    first = SimpleBuilder(input_degree=3, output_degree=1, n_gates=2, true_fun_computer=mod_value_computer(2),
+                          engine=SATEngine(), solver=Solver(), cache=cache)
+    first.prepare()
+    first.run()
+    assert first.success and not first.cached
+    assert cache.get_result(first.target, 2)[0] == 2
+    second = SimpleBuilder(input_degree=3, output_degree=1, n_gates=3, true_fun_computer=mod_value_computer(2),
+                           engine=SATEngine(), solver=Solver(), cache=cache)
+    second.prepare()
+    second.run()
+    # a stored circuit with fewer gates answers, nothing is rendered
+    assert second.cached and second.success and len(second.engine.clauses) == 0
+    assert circuit_to_dict(first.circuit_result) == circuit_to_dict(second.circuit_result)
+
+
+def test_unsat_is_stored_as_lower_bound():
+    cache = SynthesisCache(':memory:')
+    builder = SimpleBuilder(input_degree=3, output_degree=1, n_gates=1, true_fun_computer=mod_value_computer(2),
+                            engine=SATEngine(), solver=Solver(), cache=cache)
+    builder.prepare()
+    builder.run()
+    assert not builder.success and cache.lower_bound(builder.target) == 2
+    assert cache.is_unsat(builder.target, 1) and not cache.is_unsat(builder.target, 2)
+
+
+def test_restricted_symmetry_breaking():
+    cache = SynthesisCache(':memory:')
+    builder = SimpleBuilder(input_degree=3, output_degree=1, n_gates=1, true_fun_computer=mod_value_computer(2),
+                            symmetry_breaking=['all_used'], engine=SATEngine(), solver=Solver(), cache=cache)
+    builder.prepare()
+    builder.run()
+    # UNSAT with only some circuits allowed proves nothing about the others
+    assert not builder.success
+    assert cache.lower_bound(builder.target) == 0
+
+
+def test_minimizing_builder():
+    cache = SynthesisCache(':memory:')
+    first = MinimizingBuilder(input_degree=3, output_degree=1, n_gates=4, true_fun_computer=mod_n_k_computer(3, 0),
+                              direction='up', engine=SATEngine(), solver=Solver(), cache=cache)
+    first.prepare()
+    first.run()
+    assert first.min_gates == 3 and cache.lower_bound(first.target) == 3
+    second = MinimizingBuilder(input_degree=3, output_degree=1, n_gates=4, true_fun_computer=mod_n_k_computer(3, 0),
+                               engine=SATEngine(), solver=Solver(), cache=cache)
+    second.prepare()
+    second.run()
+    assert second.cached and second.min_gates == 3
+    assert circuit_to_dict(first.circuit_result) == circuit_to_dict(second.circuit_result)
+    # the proven bound answers a smaller problem without solving
+    simple = SimpleBuilder(input_degree=3, output_degree=1, n_gates=2, true_fun_computer=mod_n_k_computer(3, 0),
+                           engine=SATEngine(), solver=Solver(), cache=cache)
+    simple.prepare()
+    assert simple.cached and simple.success is False
+
+
+def test_recurse_builder():
+    cache = SynthesisCache(':memory:')
+    builders = []
+    for _ in range(2):
+        builder = RecurseBuilder(input_degree=1, output_degree=2, n_gates=4, buffer_size=2,
+                                 true_comb_computer=mod_n_comb_computer(3), engine=SATEngine(), solver=Solver(), cache=cache)
+        builder.prepare()
+        builder.run()
+        builders.append(builder)
+    first, second = builders
+    assert first.success and not first.cached and second.cached and second.success
+    assert function_to_dict(first.inv_result) == function_to_dict(second.inv_result)
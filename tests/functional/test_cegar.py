@@ -0,0 +1,36 @@
+import pytest
+
+from builders import CegarBuilder
+from engines import SATEngine
+from computers import FunctionTemplate, mod_value_computer, mod_n_k_computer
+from solvers.sat import Solver
+from utils import all_inputs
+
+
+@pytest.mark.parametrize('batch_size', [1, 4])
+def test_cegar_xor(batch_size):
+    builder = CegarBuilder(input_degree=6, output_degree=1, n_gates=5, true_fun_computer=mod_value_computer(2),
+                           n_samples=2, batch_size=batch_size, engine=SATEngine(), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert builder.success
+    template = FunctionTemplate(input_degree=6, output_degree=1, computer=mod_value_computer(2))
+    for inputs in all_inputs(dim=6):
+        assert builder.circuit_result.evaluate(inputs) == list(map(bool, template.compute(inputs)))
+
+
+def test_cegar_unsat():
+    builder = CegarBuilder(input_degree=4, output_degree=1, n_gates=3, true_fun_computer=mod_n_k_computer(3, 0),
+                           engine=SATEngine(), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert not builder.success
+
+
+def test_cegar_max_iterations():
+    builder = CegarBuilder(input_degree=5, output_degree=1, n_gates=4, true_fun_computer=mod_value_computer(2),
+                           n_samples=0, max_iterations=1, engine=SATEngine(), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert not builder.success
+    assert builder.iterations == 1
@@ -0,0 +1,55 @@
+import pytest
+
+from builders import SimpleBuilder, MinimizingBuilder, CegarBuilder, RecurseBuilder
+from engines import SATEngine
+from computers import FunctionTemplate, mod_value_computer, mod_n_k_computer, mod_n_comb_computer
+from simulator import verify
+from solvers.sat import Solver
+from universal import Circuit, ChoiceMapping, Gate
+
+
+@pytest.mark.parametrize('choice_encoding', ['combinations', 'operands'])
+def test_gate_outputs_are_fused(choice_encoding):
+    n_symbols = {}
+    for fused in (False, True):
+        engine = SATEngine(choice_encoding=choice_encoding)
+        builder = SimpleBuilder(input_degree=3, output_degree=1, n_gates=2, true_fun_computer=mod_value_computer(2),
+                                fused_gates=fused, engine=engine, solver=Solver())
+        builder.prepare()
+        builder.run()
+        assert builder.success
+        assert verify(builder.circuit_result, FunctionTemplate(3, 1, mod_value_computer(2)))
+        chosen = [var for var in engine.vars if var.array is not None and isinstance(var.array.origin, ChoiceMapping)]
+        gate_outputs = [var for var in engine.vars if var.array is not None and isinstance(var.array.origin, Gate)]
+        # a fused gate has no variables of its chosen inputs, its output comes straight from the gate
+        assert len(chosen) == (1 if fused else 1 + 2 * 2) and len(gate_outputs) == (2 if fused else 0)
+        assert all(len(engine.functions[gate.function][0]) == 4 for gate in builder.circuit.gates)
+        n_symbols[fused] = len(engine.symbols)
+    assert n_symbols[True] < n_symbols[False]
+
+
+@pytest.mark.parametrize('choice_encoding', ['combinations', 'operands'])
+def test_minimizing_builder(choice_encoding):
+    builder = MinimizingBuilder(input_degree=3, output_degree=1, n_gates=4, true_fun_computer=mod_n_k_computer(3, 0),
+                                direction='up', symmetry_breaking=Circuit.SYMMETRY_BREAKING, fused_gates=True,
+                                engine=SATEngine(choice_encoding=choice_encoding), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert builder.min_gates == 3
+    assert verify(builder.circuit_result, FunctionTemplate(3, 1, mod_n_k_computer(3, 0)))
+
+
+def test_cegar_builder():
+    builder = CegarBuilder(input_degree=5, output_degree=1, n_gates=4, true_fun_computer=mod_value_computer(2),
+                           n_samples=2, fused_gates=True, engine=SATEngine(), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert builder.success
+
+
+def test_recurse_builder():
+    builder = RecurseBuilder(input_degree=1, output_degree=2, n_gates=4, buffer_size=2,
+                             true_comb_computer=mod_n_comb_computer(3), fused_gates=True, engine=SATEngine(), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert builder.success
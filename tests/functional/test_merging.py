@@ -0,0 +1,57 @@
+import pytest
+
+from builders import SimpleBuilder, CegarBuilder
+from engines import SATEngine
+from computers import FunctionTemplate, mod_value_computer, mod_n_k_computer
+from solvers.sat import Solver
+from simulator import verify
+from universal import Variable, Constant, Equality, FunctionMapping
+
+
+def test_merged_outputs_share_symbols():
+    sizes = {}
+    for merge in (False, True):
+        engine = SATEngine(merge_equalities=merge)
+        builder = SimpleBuilder(input_degree=3, output_degree=1, n_gates=2, true_fun_computer=mod_value_computer(2),
+                                engine=engine, solver=Solver())
+        builder.prepare()
+        builder.run()
+        assert builder.success
+        assert verify(builder.circuit_result, FunctionTemplate(input_degree=3, output_degree=1, computer=mod_value_computer(2)))
+        assert (engine.vars[builder.circuit_output[0]] is engine.vars[builder.true_output[0]]) == merge
+        sizes[merge] = len(engine.clauses), len(engine.symbols)
+    # the equality needs no clauses and the true output no symbols of its own
+    assert sizes[True][0] < sizes[False][0] and sizes[True][1] == sizes[False][1] - 8
+
+
+def test_cegar_builder():
+    engine = SATEngine()
+    builder = CegarBuilder(input_degree=3, output_degree=1, n_gates=3, true_fun_computer=mod_n_k_computer(3, 0),
+                           engine=engine, solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert builder.success
+    assert verify(builder.circuit_result, builder.true_fun)
+    # every sample's circuit output is merged with its expected constant
+    assert len(engine.merged) >= len(builder.samples)
+
+
+def test_contradiction():
+    engine = SATEngine()
+    Equality([Constant(True), Constant(False)]).render(engine)
+    solver = Solver()
+    engine.init_solver(solver)
+    assert not solver.solve()
+
+
+@pytest.mark.parametrize('render_output', [False, True])
+def test_rendered_variables(render_output):
+    engine = SATEngine()
+    variable = Variable()
+    output = FunctionMapping(input_degree=1, output_degree=1)([variable])[0]
+    variable.render(engine)
+    if render_output:
+        output.render(engine)
+    Equality([variable, output]).render(engine)
+    # a variable that is not rendered yet takes the symbols of the other one, otherwise they are tied by clauses
+    assert (engine.vars[variable] == engine.vars[output]) != render_output
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from builders import SimpleBuilder, MinimizingBuilder
+from engines import SATEngine
+from computers import mod_value_computer
+from metrics import Metrics, RenderAccounting
+from solvers.sat import Solver
+from universal.basic import Renderable
+
+
+def test_simple_builder():
+    records = []
+    metrics = Metrics(trace_memory=True, callback=records.append)
+    builder = SimpleBuilder(input_degree=3, output_degree=1, n_gates=2, true_fun_computer=mod_value_computer(2),
+                            symmetry_breaking=['ordered'], engine=SATEngine(), solver=Solver())
+    builder.prepare(metrics=metrics)
+    builder.run()
+    report = json.loads(metrics.to_json())
+    assert [phase['name'] for phase in report['phases']] == ['Initialization', 'Building', 'Rendering', 'Solving']
+    assert all(phase['wall'] >= 0 and phase['peak_memory'] > 0 for phase in report['phases'])
+    assert records[:-1] == metrics.phases and records[-1] == metrics.report()
+    assert report['info']['success'] and report['info']['parameters']['n_gates'] == 2
+    # every clause and symbol is attributed to exactly one kind of renderable
+    assert sum(report['counters']['clauses'].values()) == len(builder.engine.clauses)
+    assert sum(report['counters']['symbols'].values()) == len(builder.engine.symbols)
+    assert {'FunctionMapping output', 'ChoiceMapping output', 'ChoiceMapping', 'Circuit'} <= set(report['counters']['clauses'])
+    assert report['solver_stats']['decisions'] >= 0
+
+
+def test_minimizing_builder():
+    metrics = Metrics()
+    builder = MinimizingBuilder(input_degree=3, output_degree=1, n_gates=3, true_fun_computer=mod_value_computer(2),
+                                engine=SATEngine(), solver=Solver())
+    builder.prepare(metrics=metrics)
+    builder.run()
+    assert [phase['name'] for phase in metrics.phases][2:] == \
+        ['Rendering', 'Solving with 3 gates', 'Solving with 2 gates', 'Solving with 1 gates', 'Solving']
+    # selectors are rendered outside of any renderable
+    assert 'other' in metrics.counters['clauses']
+
+
+class Broken(Renderable):
+    def do_render(self, renderer, **kwargs):
+        raise ValueError('broken')
+
+
+def test_failed_render_leaves_accounting_consistent():
+    engine = SATEngine()
+    accounting = RenderAccounting(engine, Metrics())
+    engine.set_accounting(accounting)
+    with pytest.raises(ValueError):
+        Broken().render(engine)
+    assert accounting.stack == [RenderAccounting.OTHER]
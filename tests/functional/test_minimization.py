@@ -0,0 +1,66 @@
+import pytest
+
+from builders import MinimizingBuilder
+from engines import SATEngine
+from computers import FunctionTemplate, mod_value_computer, mod_n_k_computer
+from solvers.sat import Solver
+from simulator import verify
+from universal import Circuit
+
+
+@pytest.mark.parametrize('direction', ['down', 'up'])
+@pytest.mark.parametrize('choice_encoding', ['combinations', 'operands'])
+def test_minimal_xor(direction, choice_encoding):
+    builder = MinimizingBuilder(input_degree=3, output_degree=1, n_gates=4, true_fun_computer=mod_value_computer(2),
+                                direction=direction, engine=SATEngine(choice_encoding=choice_encoding), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert builder.success
+    assert builder.min_gates == 2
+    assert len(builder.circuit_result.gate_results) == 2
+    assert builder.circuit_result.used_gates() == [0, 1]
+
+
+def test_lower_bound():
+    builder = MinimizingBuilder(input_degree=3, output_degree=1, n_gates=2, true_fun_computer=mod_value_computer(2),
+                                lower_bound=3, engine=SATEngine(), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert not builder.success
+
+
+@pytest.mark.parametrize('direction', ['down', 'up'])
+def test_loose_lower_bound(direction):
+    def and_computer(inputs):
+        return [inputs[0] & inputs[1]]
+
+    # a single gate is enough, the search does not go below the bound but keeps the circuit it found
+    builder = MinimizingBuilder(input_degree=3, output_degree=1, n_gates=4, true_fun_computer=and_computer,
+                                lower_bound=3, direction=direction, engine=SATEngine(), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert builder.success and builder.min_gates == 3
+    assert verify(builder.circuit_result, FunctionTemplate(3, 1, and_computer))
+
+
+@pytest.mark.parametrize('symmetry_breaking', [[option] for option in Circuit.SYMMETRY_BREAKING] + [Circuit.SYMMETRY_BREAKING])
+@pytest.mark.parametrize('choice_encoding', ['combinations', 'operands'])
+def test_symmetry_breaking(symmetry_breaking, choice_encoding):
+    builder = MinimizingBuilder(input_degree=3, output_degree=1, n_gates=4, true_fun_computer=mod_n_k_computer(3, 0),
+                                direction='up', symmetry_breaking=symmetry_breaking,
+                                engine=SATEngine(choice_encoding=choice_encoding), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert builder.min_gates == 3
+
+
+def test_non_trivial_keeps_negations():
+    def not_computer(inputs):
+        return [not inputs[0]]
+
+    builder = MinimizingBuilder(input_degree=2, output_degree=1, n_gates=1, true_fun_computer=not_computer,
+                                symmetry_breaking=['non_trivial'], engine=SATEngine(), solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert builder.success and builder.min_gates == 1
+    assert verify(builder.circuit_result, FunctionTemplate(2, 1, not_computer))
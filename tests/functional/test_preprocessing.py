@@ -0,0 +1,33 @@
+import pytest
+
+from builders import SimpleBuilder, MinimizingBuilder
+from engines import SATEngine
+from engines.sat.preprocessor import Preprocessor
+from computers import FunctionTemplate, mod_value_computer, mod_n_k_computer
+from solvers.sat import Solver
+from simulator import verify
+
+
+@pytest.mark.parametrize('eliminate', [False, True])
+@pytest.mark.parametrize('n_gates, success', [(2, True), (1, False)])
+def test_simple_builder(eliminate, n_gates, success):
+    engine = SATEngine(preprocessor=Preprocessor(eliminate=eliminate))
+    builder = SimpleBuilder(input_degree=3, output_degree=1, n_gates=n_gates, true_fun_computer=mod_value_computer(2),
+                            engine=engine, solver=Solver())
+    builder.prepare()
+    builder.run()
+    assert builder.success == success
+    assert engine.preprocessor.n_output_clauses < len(engine.clauses)
+    if success:
+        assert verify(builder.circuit_result, FunctionTemplate(3, 1, mod_value_computer(2)))
+
+
+@pytest.mark.parametrize('amo_encoding, solver_name', [('auto', 'cd'), ('native', 'mc')])
+def test_minimizing_builder(amo_encoding, solver_name):
+    engine = SATEngine(amo_encoding=amo_encoding, preprocessor=Preprocessor(eliminate=True))
+    builder = MinimizingBuilder(input_degree=3, output_degree=1, n_gates=4, true_fun_computer=mod_n_k_computer(3, 0),
+                                symmetry_breaking=['ordered'], engine=engine, solver=Solver(name=solver_name))
+    builder.prepare()
+    builder.run()
+    assert builder.min_gates == 3
+    assert verify(builder.circuit_result, FunctionTemplate(3, 1, mod_n_k_computer(3, 0)))
@@ -0,0 +1,55 @@
+import sys
+
+import pytest
+
+from engines import SATEngine
+from solvers.sat import Solver
+from universal import Variable, Constant, FunctionMapping, Circuit, Equality
+from universal.basic.renderable import render_levels
+
+
+def not_chain(length):
+    not_function = FunctionMapping(input_degree=1, output_degree=1)
+    not_function.set_column(0, 0b01)
+    variables = [Constant(True)]
+    for _ in range(length):
+        variables.append(not_function([variables[-1]])[0])
+    return variables
+
+
+def test_deep_chain():
+    length = 2 * sys.getrecursionlimit()
+    variables = not_chain(length)
+    engine = SATEngine()
+    Equality([variables[-1], Constant(length % 2 == 0)]).render(engine)
+    assert all(engine.is_rendered(variable) for variable in variables)
+    solver = Solver()
+    engine.init_solver(solver)
+    assert solver.solve()
+
+
+def test_order_and_levels():
+    circuit = Circuit(input_degree=3, output_degree=1, n_gates=3)
+    inputs = [Variable() for _ in range(3)]
+    equality = Equality([circuit(inputs)[0], FunctionMapping(input_degree=3, output_degree=1)(inputs)[0]])
+    engine = SATEngine()
+    order = engine.render_order([equality, circuit])
+    # computing the order does not prepare the equality
+    assert engine.render_order([equality, circuit]) == order and not engine.merged
+    assert len(set(order)) == len(order) and equality in order and order[-1] is circuit
+    positions = {renderable: position for position, renderable in enumerate(order)}
+    assert all(positions[dep] < positions[renderable] for renderable in order for dep in renderable.render_dependencies())
+    levels = render_levels(order)
+    assert sum(map(len, levels)) == len(order)
+    level_of = {renderable: index for index, level in enumerate(levels) for renderable in level}
+    assert all(level_of[dep] < level_of[renderable] for renderable in order for dep in renderable.render_dependencies())
+    engine.render_all([equality, circuit])
+    assert engine.render_order([equality, circuit]) == []
+
+
+def test_ignore_dependencies_is_deprecated():
+    engine = SATEngine()
+    variable = Variable()
+    with pytest.deprecated_call():
+        variable.render(engine, ignore_dependencies=True)
+    assert engine.is_rendered(variable)
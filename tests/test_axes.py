@@ -0,0 +1,37 @@
+from universal.axes import Axis, Axes, closure
+
+
+def test_projection_matches_coordinates():
+    first, second, third = Axis(), Axis(), Axis()
+    source = Axes(axes=[first, second, third])
+    for target in [Axes(axes=[first, third]), Axes(axes=[second]), Axes(), source]:
+        table = source.projection(target)
+        assert len(table) == source.size
+        for coord in source.coordinates():
+            projected = coord.project(target)
+            assert table[coord.int_value()] == projected.int_value()
+            assert all(projected[axis] == coord[axis] for axis in target.axes)
+
+
+def test_projection_is_cached():
+    first, second = Axis(), Axis()
+    source = closure(Axes(axes=[first]), Axes(axes=[second]))
+    assert source.projection(Axes(axes=[second])) is Axes(axes=[first, second]).projection(Axes(axes=[second]))
+
+
+def test_axes_are_interned():
+    first, second, third = Axis(), Axis(), Axis()
+    axes = Axes(axes=[second, first])
+    assert axes is Axes(axes=[first, second, first])
+    assert closure(Axes(axes=[first]), Axes(axes=[second])) is axes
+    assert closure(axes, Axes(axes=[first])) is axes
+    assert closure() is Axes()
+    assert len({axes, Axes(axes=[first, second]), Axes(axes=[third])}) == 2
+
+
+def test_iteration_yields_indices():
+    first, second = Axis(), Axis()
+    axes = Axes(axes=[second, first])
+    assert list(axes) == [0, 1, 2, 3]
+    assert [(coord[first], coord[second]) for coord in axes.coordinates()] == \
+        [(False, False), (True, False), (False, True), (True, True)]
@@ -0,0 +1,55 @@
+import os
+import signal
+
+import benchmarks.suite
+from benchmarks.suite import CASES, run_case, run_suite, select_cases, compare, failed
+
+
+def make_result(**kwargs):
+    result = dict(success=True, render_time=1.0, solve_time=1.0, clauses=100, symbols=10, max_rss=1000)
+    result.update(kwargs)
+    return result
+
+
+def test_compare():
+    baseline = {'a@cd': make_result(), 'b@cd': make_result()}
+    assert compare(baseline, {'a@cd': make_result(render_time=1.1, clauses=105), 'c@cd': make_result()}) == []
+    regressions = compare(baseline, {'a@cd': make_result(clauses=130), 'b@cd': make_result(success=False)})
+    assert len(regressions) == 2
+    assert regressions[0].startswith('a@cd: clauses 100 -> 130')
+    assert regressions[1] == 'b@cd: success True -> False'
+    # too short to compare
+    assert compare(baseline, {'a@cd': make_result(render_time=0.005)}, min_time=0.01) == []
+    assert compare({'a@cd': make_result(render_time=0.001)}, {'a@cd': make_result(render_time=0.005)}) == []
+
+
+class KilledBuilder:
+    def __init__(self, kill, **kwargs):
+        self.kill = kill
+
+    def prepare(self, **kwargs):
+        if self.kill:
+            os.kill(os.getpid(), signal.SIGKILL)
+        raise ValueError('broken builder')
+
+
+def test_failed_cases(monkeypatch):
+    monkeypatch.setattr(benchmarks.suite, 'POLL_INTERVAL', 0.05)
+    cases = [('killed', KilledBuilder, dict(kill=True)), ('raised', KilledBuilder, dict(kill=False))]
+    results = run_suite(cases=cases, solvers=['cd'], log=lambda line: None)
+    assert failed(results) == ['killed@cd', 'raised@cd']
+    assert 'exit code -9' in results['killed@cd']['error'] and 'broken builder' in results['raised@cd']['error']
+    assert compare({'killed@cd': make_result()}, results) == ['killed@cd: failed: process died with exit code -9']
+
+
+def test_select_cases():
+    assert select_cases(None) == CASES
+    assert [case[0] for case in select_cases(['simple/xor/4/*'])] == ['simple/xor/4/3', 'simple/xor/4/2']
+
+
+def test_run():
+    case = select_cases(['simple/mod3eq0/3/2'])[0]
+    result = run_case(case, 'cd')
+    assert result['success'] is False and result['clauses'] > 0 and result['symbols'] > 0
+    results = run_suite(cases=[case], solvers=['cd'], log=lambda line: None)
+    assert results['simple/mod3eq0/3/2@cd']['clauses'] == result['clauses']
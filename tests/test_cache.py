@@ -0,0 +1,31 @@
+from cache import SynthesisCache
+
+
+def test_target():
+    target = SynthesisCache.target('circuit', [0b0110], input_degree=2, output_degree=1)
+    assert target == SynthesisCache.target('circuit', [0b0110], output_degree=1, input_degree=2)
+    assert target != SynthesisCache.target('circuit', [0b1001], input_degree=2, output_degree=1)
+    assert target != SynthesisCache.target('circuit', [0b0110], input_degree=2, output_degree=2)
+    assert target != SynthesisCache.target('recurse', [0b0110], input_degree=2, output_degree=1)
+
+
+def test_results(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = SynthesisCache(path)
+    cache.store_result('t', 5, {'gates': 5})
+    cache.store_result('t', 3, {'gates': 3})
+    cache.close()
+    cache = SynthesisCache(path)
+    assert cache.get_result('t', 2) is None
+    assert cache.get_result('t', 4) == (3, {'gates': 3})
+    assert cache.get_result('t', 10) == (3, {'gates': 3})
+    assert cache.get_result('other', 10) is None
+
+
+def test_bounds():
+    cache = SynthesisCache(':memory:')
+    assert cache.lower_bound('t') == 0
+    cache.store_unsat('t', 4)
+    cache.store_unsat('t', 2)
+    assert cache.lower_bound('t') == 5
+    assert cache.is_unsat('t', 4) and not cache.is_unsat('t', 5)
@@ -0,0 +1,136 @@
+import io
+import os
+import sys
+
+import pytest
+from pysat.formula import CNF
+
+from builders import SimpleBuilder
+from computers import FunctionTemplate, mod_value_computer
+from engines import SATEngine
+from engines.sat.clauses import ClauseStore, DimacsSink, CountingSink, SolverSink
+from simulator import verify
+from solvers.sat import Solver, BufferedSolver, BinarySolver
+
+# a solver binary that solves the DIMACS file given as the first argument or its stdin with pysat
+FAKE_SOLVER = f"""#!{sys.executable}
+import sys
+from pysat.formula import CNF
+from pysat.solvers import Solver
+formula = CNF(from_file=sys.argv[1]) if len(sys.argv) > 1 else CNF(from_fp=sys.stdin)
+with Solver(name='cd', bootstrap_with=formula.clauses) as solver:
+    if solver.solve():
+        print('s SATISFIABLE')
+        print('v ' + ' '.join(map(str, solver.get_model())) + ' 0')
+    else:
+        print('s UNSATISFIABLE')
+"""
+
+
+def test_clause_store():
+    store = ClauseStore()
+    store.append([1, -2])
+    store.extend([[3], [-1, 2, -3]])
+    assert len(store) == 3
+    assert list(store) == [[1, -2], [3], [-1, 2, -3]]
+    assert store[1] == [3]
+    assert store.literals.tolist() == [1, -2, 0, 3, 0, -1, 2, -3, 0]
+
+
+def test_empty_clause_store():
+    store = ClauseStore()
+    assert len(store) == 0
+    assert list(store) == []
+
+
+def test_write_dimacs():
+    store = ClauseStore()
+    store.extend([[1, -2], [3], [-10, 2, 3]])
+    assert store.max_variable == 10
+    stream = io.BytesIO()
+    store.write_dimacs(stream, chunk_size=2)
+    assert stream.getvalue().decode().split('\n') == ['p cnf 10 3', '1 -2 0', '3 0', '-10 2 3 0', '']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 100])
+def test_write_empty_clauses(chunk_size):
+    store = ClauseStore()
+    store.extend([[], [1, -2], [], [], [3]])
+    stream = io.BytesIO()
+    store.write_dimacs(stream, chunk_size=chunk_size)
+    text = stream.getvalue().decode()
+    assert text.split('\n') == ['p cnf 3 5', '0', '1 -2 0', '0', '0', '3 0', '']
+    assert CNF(from_string=text).clauses == [[], [1, -2], [], [], [3]]
+
+
+def test_dimacs_sink():
+    stream = io.BytesIO()
+    sink = DimacsSink(stream, chunk_size=2)
+    sink.extend([[1, -2], [3]])
+    sink.append([-10, 2, 3])
+    sink.close()
+    header, *lines = stream.getvalue().decode().split('\n')
+    assert header.split() == ['p', 'cnf', '10', '3']
+    assert lines == ['1 -2 0', '3 0', '-10 2 3 0', '']
+
+
+def test_dimacs_sink_needs_header():
+    read_end, write_end = os.pipe()
+    with open(write_end, 'wb') as stream, open(read_end, 'rb'):
+        with pytest.raises(AssertionError, match='cannot seek'):
+            DimacsSink(stream)
+    stream = io.BytesIO()
+    sink = DimacsSink(stream, n_variables=3, n_clauses=2)
+    sink.append([1, -3])
+    with pytest.raises(AssertionError, match='header says 2 clauses'):
+        sink.close()
+
+
+@pytest.mark.parametrize('piped', [False, True])
+def test_solving_dimacs_sink(tmp_path, piped):
+    solver_path = tmp_path / 'solver'
+    solver_path.write_text(FAKE_SOLVER)
+    solver_path.chmod(0o755)
+    parameters = dict(input_degree=3, output_degree=1, n_gates=2, true_fun_computer=mod_value_computer(2))
+    solver = BinarySolver(str(solver_path))
+    if piped:
+        counter = CountingSink()
+        SimpleBuilder(engine=SATEngine(sink=counter), solver=solver, **parameters).prepare()
+        sink = solver.start(n_variables=counter.max_variable, n_clauses=counter.n_clauses)
+    else:
+        sink = DimacsSink(open(tmp_path / 'formula.cnf', 'wb+'))
+    builder = SimpleBuilder(engine=SATEngine(sink=sink), solver=solver, **parameters)
+    builder.prepare()
+    builder.run()
+    sink.stream.close()
+    assert builder.success
+    assert verify(builder.circuit_result, FunctionTemplate(input_degree=3, output_degree=1, computer=mod_value_computer(2)))
+
+
+def test_counting_sink():
+    sink = CountingSink()
+    sink.extend([[1, -2], [3], [-10, 2, 3]])
+    assert (len(sink), sink.n_literals, sink.max_variable) == (3, 6, 10)
+
+
+def test_solver_sink():
+    with Solver() as solver:
+        sink = SolverSink(solver)
+        sink.extend([[1, 2], [-1]])
+        sink.feed(solver)
+        assert solver.solve()
+        assert solver.get_model() == [-1, 2]
+
+
+def test_shared_store_is_not_changed():
+    store = ClauseStore()
+    store.extend([[1, 2], [-1]])
+    solver = BufferedSolver()
+    store.feed(solver)
+    assert solver.clauses is store
+    store.append([3])
+    store.feed(solver, start=2)
+    solver.add_clause([-2, 4])
+    assert list(store) == [[1, 2], [-1], [3]]
+    assert list(solver.clauses) == [[1, 2], [-1], [3], [-2, 4]]
+    assert (solver.clauses.n_clauses, solver.clauses.max_variable) == (4, 4)
@@ -0,0 +1,33 @@
+import pytest
+
+from computers import FunctionTemplate, mod_value_computer, mod_n_k_computer, mod_n_comb_computer
+from universal import FunctionMapping
+from utils import all_inputs
+
+
+@pytest.mark.parametrize('input_degree, output_degree, computer', [
+    (input_degree, output_degree, computer)
+    for input_degree in range(1, 7)
+    for output_degree, computer in [
+        (1, mod_value_computer(2)), (2, mod_value_computer(3)), (3, mod_value_computer(5)), (4, mod_value_computer(3)),
+        (1, mod_n_k_computer(3, 0)), (1, mod_n_k_computer(4, 2)),
+    ]
+] + [
+    (input_degree, 2, mod_n_comb_computer(n)) for input_degree in range(3, 8) for n in (3, 4)
+])
+def test_batch_columns(input_degree, output_degree, computer):
+    template = FunctionTemplate(input_degree=input_degree, output_degree=output_degree, computer=computer)
+    assert template.columns() == template._row_columns()
+
+
+def test_set_truthtable():
+    template = FunctionTemplate(input_degree=4, output_degree=2, computer=mod_value_computer(3))
+    function = template.make_function()
+    for row, inputs in enumerate(all_inputs(dim=4)):
+        assert function.values.row(row) == list(map(bool, template.compute(inputs)))
+
+
+def test_zerofill_prohibited():
+    template = FunctionTemplate(input_degree=3, output_degree=2, computer=mod_value_computer(2))
+    with pytest.raises(AssertionError):
+        template.set_truthtable(FunctionMapping(input_degree=3, output_degree=2), zerofill=False)
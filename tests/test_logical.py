@@ -0,0 +1,18 @@
+from itertools import count, product
+
+import pytest
+
+from engines.sat.logical import exactly_one, AT_MOST_ONE_ENCODINGS
+from solvers.sat import Solver
+
+
+@pytest.mark.parametrize('encoding', list(AT_MOST_ONE_ENCODINGS))
+@pytest.mark.parametrize('n', [1, 2, 5, 9])
+def test_exactly_one(encoding, n):
+    symbols = list(range(1, n + 1))
+    counter = count(n + 1)
+    clauses = exactly_one(symbols, encoding=encoding, new_symbols=lambda k: [next(counter) for _ in range(k)])
+    with Solver(bootstrap_with=clauses) as solver:
+        for values in product([False, True], repeat=n):
+            assumptions = [symbol if value else -symbol for symbol, value in zip(symbols, values)]
+            assert solver.solve(assumptions=assumptions) == (sum(values) == 1)
@@ -0,0 +1,34 @@
+import os
+import signal
+from functools import partial
+
+import pytest
+from pysat.solvers import Solver
+
+from solvers.portfolio import PortfolioSolver
+from solvers.sat import BinarySolver, SolveStatuses
+
+
+class KilledSolver:
+    def append_formula(self, formula):
+        pass
+
+    def solve(self):
+        os.kill(os.getpid(), signal.SIGKILL)
+
+
+def make_portfolio(backends):
+    portfolio = PortfolioSolver(backends=backends)
+    portfolio.POLL_INTERVAL = 0.05
+    portfolio.append_formula([[1, 2], [-1]])
+    return portfolio
+
+
+@pytest.mark.parametrize('failing', [partial(BinarySolver, '/bin/true'), KilledSolver])
+def test_failed_backend(failing):
+    portfolio = make_portfolio([failing, partial(Solver, name='cd')])
+    assert portfolio.solve()
+    assert portfolio.winner == 1 and portfolio.status is SolveStatuses.SAT
+    assert portfolio.get_model()[:2] == [-1, 2]
+    with pytest.raises(RuntimeError, match='All portfolio backends failed'):
+        make_portfolio([failing, KilledSolver]).solve()
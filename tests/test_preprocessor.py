@@ -0,0 +1,66 @@
+from random import Random
+
+import pytest
+from pysat.solvers import Solver
+
+from engines.sat.clauses import ClauseStore
+from engines.sat.preprocessor import Preprocessor, OccurrenceIndex
+
+
+def random_formula(random, n_symbols, n_clauses):
+    clauses = [[random.choice([-1, 1]) * random.randint(1, n_symbols) for _ in range(random.randint(1, 3))]
+               for _ in range(n_clauses)]
+    return clauses + [[random.choice([-1, 1]) * random.randint(1, n_symbols)] for _ in range(random.randint(0, 3))]
+
+
+def solve(clauses):
+    with Solver(name='cd', bootstrap_with=clauses) as solver:
+        return solver.get_model() if solver.solve() else None
+
+
+def satisfies(model, clauses):
+    values = {abs(literal): literal > 0 for literal in model}
+    return all(any(values[abs(literal)] == (literal > 0) for literal in clause) for clause in clauses)
+
+
+@pytest.mark.parametrize('eliminate', [False, True])
+def test_random_formulas(eliminate):
+    random = Random(0)
+    for _ in range(300):
+        n_symbols = random.randint(3, 10)
+        clauses = random_formula(random, n_symbols, random.randint(3, 30))
+        preprocessor = Preprocessor(eliminate=eliminate)
+        model = solve(list(preprocessor.run(clauses, n_symbols)))
+        assert (model is not None) == (solve(clauses) is not None)
+        if model is not None:
+            extended = preprocessor.extend_model(model)
+            assert len(extended) == n_symbols
+            assert satisfies(extended, clauses)
+
+
+def test_frozen():
+    preprocessor = Preprocessor(eliminate=True, frozen=[1, 3])
+    simplified = list(preprocessor.run([[1], [-1, 2], [2, 3, 4], [-3, 4], [3, -5], [-3, 5]], 5))
+    # the unit of a frozen symbol is kept, the other fixed symbols are gone
+    assert [1] in simplified
+    assert all(abs(literal) != 2 for clause in simplified for literal in clause)
+    assert [symbol for symbol, _ in preprocessor.eliminated] == [4, 5]
+    assert not preprocessor.unsat
+
+
+def test_unsat():
+    preprocessor = Preprocessor()
+    assert solve(list(preprocessor.run([[1, 2], [-1], [-2]], 2))) is None
+    assert preprocessor.unsat
+
+
+def test_occurrence_index():
+    store = ClauseStore()
+    store.extend([[1, -2], [2, 3], [-1, -2, 3]])
+    occurrences = OccurrenceIndex(store, 4)
+    assert [occurrences[literal] for literal in (1, -1, 2, -2, 3, -3, 4)] == [[0], [2], [1], [0, 2], [1, 2], [], []]
+    occurrences.add(3, [-3, 4])
+    assert occurrences[-3] == [3] and occurrences.count(4) == 1 and occurrences.count(-2) == 2
+    # the store given to the preprocessor is not changed
+    Preprocessor(eliminate=True).run(store, 3)
+    assert list(store) == [[1, -2], [2, 3], [-1, -2, 3]]
@@ -0,0 +1,66 @@
+from random import Random
+
+from computers import FunctionTemplate, mod_value_computer, mod_n_k_computer
+from simulator import Simulator, input_columns, pack_rows, row_inputs, set_bits, mismatches, verify
+from universal import ChoiceMappingResult, FunctionMappingResult, GateResult, CircuitResult
+from utils import all_inputs
+
+
+def make_gate(choices, truthtable, input_degree):
+    function_result = FunctionMappingResult(input_degree=2, output_degree=1)
+    for index, value in enumerate(truthtable):
+        function_result.set_value(input_index=index, output_value=bool(int(value)), output_index=0)
+    choice_result = ChoiceMappingResult(choices, input_degree=input_degree, output_degree=2)
+    return GateResult(choice_result=choice_result, function_result=function_result)
+
+
+def make_circuit(input_degree, gates, outputs):
+    gate_results = [make_gate(choices, truthtable, input_degree + i) for i, (choices, truthtable) in enumerate(gates)]
+    choice_result = ChoiceMappingResult(outputs, input_degree=input_degree + len(gates), output_degree=len(outputs))
+    return CircuitResult(gate_results=gate_results, choice_result=choice_result)
+
+
+def xor_chain(input_degree):
+    gates = [((0, 1), '0110')] + [((i + 1, input_degree + i - 1), '0110') for i in range(1, input_degree - 1)]
+    return make_circuit(input_degree, gates, (input_degree + len(gates) - 1,))
+
+
+def test_input_columns():
+    for input_degree in range(1, 6):
+        columns = input_columns(input_degree)
+        assert pack_rows(all_inputs(dim=input_degree)) == columns
+        for row, inputs in enumerate(all_inputs(dim=input_degree)):
+            assert row_inputs(row, input_degree) == inputs
+
+
+def test_set_bits():
+    assert list(set_bits(0b101100)) == [2, 3, 5]
+    assert list(set_bits(0b101100, limit=2)) == [2, 3]
+    assert list(set_bits(0)) == []
+
+
+def test_matches_row_evaluation():
+    random = Random(0)
+    input_degree, n_gates = 4, 6
+    for _ in range(20):
+        gates = []
+        for i in range(n_gates):
+            choices = tuple(sorted(random.sample(range(input_degree + i), 2)))
+            gates.append((choices, [random.getrandbits(1) for _ in range(4)]))
+        outputs = tuple(sorted(random.sample(range(input_degree + n_gates), 2)))
+        circuit_result = make_circuit(input_degree, gates, outputs)
+        simulator = Simulator(circuit_result)
+        rows = list(all_inputs(dim=input_degree))
+        expected = [circuit_result.evaluate(inputs) for inputs in rows]
+        assert simulator.evaluate(rows) == expected
+        columns = simulator.truthtable()
+        for row, outputs_values in enumerate(expected):
+            assert [bool(column >> row & 1) for column in columns] == outputs_values
+
+
+def test_verify():
+    input_degree = 10
+    circuit_result = xor_chain(input_degree)
+    assert verify(circuit_result, FunctionTemplate(input_degree, 1, mod_value_computer(2)))
+    wrong = FunctionTemplate(input_degree, 1, mod_n_k_computer(2, 0))
+    assert mismatches(circuit_result, wrong) == (1 << 2 ** input_degree) - 1
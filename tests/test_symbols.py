@@ -0,0 +1,23 @@
+import pytest
+
+from engines.sat.symbols import SymbolAllocator
+
+
+def test_symbol_allocator_ranges():
+    symbols = SymbolAllocator()
+    first = symbols.allocate(2)
+    second = symbols.allocate(4)
+    assert list(first) == [1, 2]
+    assert list(second) == [3, 4, 5, 6]
+    assert len(symbols) == 6
+
+
+def test_symbol_allocator_names():
+    symbols = SymbolAllocator()
+    symbols.allocate(2, namer=lambda i: f'first_{i}')
+    symbols.allocate(3)
+    assert symbols.name(2) == 'first_1'
+    assert symbols.name(-1) == 'first_0'
+    assert symbols.name(4) == 'symbol_4'
+    with pytest.raises(AssertionError):
+        symbols.name(6)
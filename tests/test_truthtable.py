@@ -0,0 +1,50 @@
+import pytest
+
+from universal import TruthTable
+from universal.truthtable import input_index
+
+
+def test_set_and_get():
+    table = TruthTable(input_degree=4, output_degree=2)
+    table.set(output_index=1, input_index=11, value=True)
+    table.set(output_index=1, input_index=3, value=False)
+    assert table[1, 11] is True
+    assert table[1, 3] is False
+    assert table.is_defined(1, 11) and not table.is_defined(0, 11)
+    assert list(table.items(1)) == [(3, False), (11, True)]
+    assert not table.is_complete()
+    with pytest.raises(AssertionError):
+        table.set(output_index=1, input_index=11, value=True)
+    with pytest.raises(AssertionError):
+        table[0, 11]
+
+
+def test_columns():
+    table = TruthTable(input_degree=3, output_degree=2)
+    table.set_column(output_index=0, column=0b10010110)
+    table.set_column(output_index=1, column=0b1000, defined=0b1111)
+    table.set_column(output_index=1, column=0b10000000, defined=0b11110000)
+    assert table.column(0) == 0b10010110
+    assert table.column(1) == 0b10001000
+    assert table.is_complete()
+    assert table.row(3) == [False, True]
+    with pytest.raises(AssertionError):
+        table.set_column(output_index=0, column=0)
+
+
+def test_equality():
+    tables = [TruthTable(input_degree=2, output_degree=1) for _ in range(2)]
+    for table in tables:
+        table.set_column(output_index=0, column=0b0110)
+    assert tables[0] == tables[1] and hash(tables[0].key()) == hash(tables[1].key())
+    with pytest.raises(TypeError):
+        hash(tables[0])
+    assert tables[0] != 0b0110
+    other = TruthTable(input_degree=2, output_degree=1)
+    other.set_column(output_index=0, column=0b0110, defined=0b0111)
+    assert other != tables[0] and other.key() != tables[0].key()
+
+
+def test_input_index():
+    assert input_index([True, False, True]) == 5
+    assert input_index([]) == 0
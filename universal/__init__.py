@@ -1,6 +1,7 @@
-from universal.basic.variable import Variable
+from universal.basic.variable import Variable, Constant
 from universal.basic import Array, ChoiceMapping, FunctionMapping, Equality
 from universal.extended import Circuit, Gate, make_equalities
 from universal.axes import closure, Axes, Coordinates
+from universal.truthtable import TruthTable
 from universal.renderer import Renderer
 from universal.result import ChoiceMappingResult, FunctionMappingResult, GateResult, CircuitResult, Decoder
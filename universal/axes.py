@@ -1,5 +1,5 @@
-from collections import UserDict
-from itertools import product
+from collections.abc import Mapping
+from weakref import WeakValueDictionary
 
 from utils import InstanceCounterMeta
 
@@ -20,39 +20,106 @@ class Axis(metaclass=InstanceCounterMeta):
 
 
 class Axes:
-    def __init__(self, axes=None):
-        self.axes = tuple(sorted(axes or ()))
+    """
+    A point of the axes is encoded by an integer index: bit `i` of the index is the value of the `i`-th sorted axis.
+    Axes are interned: there is one instance for every set of axes, so unions and projection tables
+    are computed once and shared by all the variables with the same axes
+    """
+    _interned = WeakValueDictionary()  # sorted tuple of axes -> Axes
+
+    def __new__(cls, axes=None):
+        key = tuple(sorted(set(axes or ())))
+        instance = cls._interned.get(key)
+        if instance is None:
+            instance = super().__new__(cls)
+            instance.axes = key
+            instance.positions = {axis: position for position, axis in enumerate(key)}
+            instance.size = 2 ** len(key)
+            instance._unions = {}  # Axes -> union with it
+            instance._projections = {}  # Axes -> projection table
+            cls._interned[key] = instance
+        return instance
 
     def __iter__(self):
-        for values in product([False, True], repeat=len(self.axes)):
-            elem = Coordinates()
-            elem.update(zip(self.axes, values))
-            yield elem
+        return iter(range(self.size))
+
+    def __len__(self):
+        return self.size
 
     def __eq__(self, other):
-        return self.axes == other.axes
+        return self is other or isinstance(other, Axes) and self.axes == other.axes
+
+    def __hash__(self):
+        return hash(self.axes)
+
+    def __repr__(self):
+        return f'Axes({", ".join(map(str, self.axes))})'
+
+    def coordinates(self):
+        """
+        Lazy per-axis views of the points, in index order
+        """
+        for index in range(self.size):
+            yield Coordinates(self, index)
+
+    def union(self, other: 'Axes') -> 'Axes':
+        result = self._unions.get(other)
+        if result is None:
+            if all(axis in self.positions for axis in other.axes):
+                result = self
+            elif all(axis in other.positions for axis in self.axes):
+                result = other
+            else:
+                result = Axes(axes=self.axes + other.axes)
+            self._unions[other] = result
+        return result
+
+    def projection(self, axes: 'Axes') -> list:
+        """
+        Table mapping the index of every point of these axes to the index of its projection on `axes`
+        """
+        table = self._projections.get(axes)
+        if table is None:
+            assert all(axis in self.positions for axis in axes.axes), f'Cannot project {self.axes} on {axes.axes}'
+            table = self._projections[axes] = projection_table(self.axes, axes.positions)
+        return table
+
+
+def projection_table(source_axes: tuple, target_positions: dict) -> list:
+    table = [0]
+    # the points with bit `i` set are exactly the points below 2^i shifted by 2^i
+    for axis in source_axes:
+        shift = 1 << target_positions[axis] if axis in target_positions else 0
+        table += [index + shift for index in table]
+    return table
 
 
 def closure(*axes_instances):
-    axes = set()
+    result = Axes()
     for instance in axes_instances:
-        axes.update(instance.axes)
-    return Axes(axes=axes)
+        result = result.union(instance)
+    return result
+
 
+class Coordinates(Mapping):
+    """
+    Read-only view of the point `index` of `axes`: axis -> its value
+    """
+    def __init__(self, axes: Axes, index: int):
+        self.axes = axes
+        self.index = index
+
+    def __getitem__(self, axis) -> bool:
+        return bool(self.index >> self.axes.positions[axis] & 1)
+
+    def __iter__(self):
+        return iter(self.axes.axes)
+
+    def __len__(self):
+        return len(self.axes.axes)
 
-class Coordinates(UserDict):
     def project(self, axes: Axes):
-        assert all(axis in self.data for axis in axes.axes), \
-            f'Cannot project coordinates on {self.data.keys()} on {axes.axes}'
-        result = Coordinates()
-        result.update(((axis, self.data[axis]) for axis in axes.axes))
-        return result
+        return Coordinates(axes, self.axes.projection(axes)[self.index])
 
     def int_value(self):
-        result = 0
-        base = 1
-        # dict is supposed to be sorted, so the `sorted` is just a precaution here
-        for _, val in sorted(self.items()):
-            result += int(val) * base
-            base *= 2
-        return result
+        return self.index
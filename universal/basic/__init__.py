@@ -1,7 +1,6 @@
-from collections import defaultdict
-
 from universal.basic.renderable import Renderable, RenderableObject
-from universal.basic.variable import Variable
+from universal.basic.variable import Variable, Constant
+from universal.truthtable import TruthTable, input_index
 
 
 class Array(RenderableObject):
@@ -22,10 +21,8 @@ class Array(RenderableObject):
     def __iter__(self):
         yield from self.variables
 
-    def pre_render(self, renderer, **kwargs):
-        super().pre_render(renderer, **kwargs)
-        if self.origin and not renderer.is_rendered(self.origin):
-            self.origin.render(renderer, **kwargs)
+    def render_dependencies(self) -> list:
+        return super().render_dependencies() + [self.origin]
 
     def do_render(self, renderer, **kwargs):
         renderer.render_array(self, **kwargs)
@@ -55,15 +52,20 @@ class FunctionMapping(RenderableMapping):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.values = defaultdict(dict)
+        self.values = TruthTable(input_degree=self.input_degree, output_degree=self.output_degree)
 
     def set_value(self, input_values, output_index, output_value):
-        assert 0 <= output_index < self.output_degree, f'output_index is {output_index}, must be in [0, {self.output_degree})'
         assert len(input_values) == self.input_degree, f'Wrong input size: {len(input_values)} instead of {self.input_degree}'
         assert all([value in self.POSSIBLE_VALUES for value in input_values]), f'All input values must be one of {self.POSSIBLE_VALUES}'
         assert output_value in self.POSSIBLE_VALUES, f'Output value is {output_value}, must be one of {self.POSSIBLE_VALUES}'
-        assert output_index not in self.values[input_values], f'Output index {output_index} is already set for values {input_values}'
-        self.values[output_index][tuple(input_values)] = output_value
+        self.values.set(output_index=output_index, input_index=input_index(input_values), value=output_value)
+
+    def set_column(self, output_index, column, defined=None):
+        """
+        Sets the output `output_index` on all the inputs at once (or on the inputs of the `defined` mask),
+        bit `r` of `column` is the value on the `r`-th input of `all_inputs`
+        """
+        self.values.set_column(output_index=output_index, column=column, defined=defined)
 
     def do_render(self, renderer, **kwargs):
         renderer.render_function_mapping(self, **kwargs)
@@ -85,11 +87,8 @@ class Condition(Renderable):
         super().__init__()
         self.variables = variables
 
-    def pre_render(self, renderer, **kwargs):
-        super().pre_render(renderer, **kwargs)
-        for var in self.variables:
-            if not renderer.is_rendered(var):
-                var.render(renderer=renderer, **kwargs)
+    def render_dependencies(self) -> list:
+        return list(self.variables)
 
 
 class Equality(Condition):
@@ -98,5 +97,8 @@ class Equality(Condition):
         for var1, var2 in zip(self.variables, self.variables[1:]):
             assert var1.axes == var2.axes, 'Variables {var1} and {var2} are not comparable'
 
+    def prepare(self, renderer, **kwargs):
+        renderer.prepare_equality(self, **kwargs)
+
     def do_render(self, renderer, **kwargs):
         renderer.render_equality(self, **kwargs)
@@ -1,3 +1,5 @@
+import warnings
+
 from utils import InstanceCounterMeta
 from universal.axes import closure, Axes
 
@@ -8,6 +10,18 @@ class Renderable(metaclass=InstanceCounterMeta):
     def __init__(self):
         self.count = next(self.__class__.counter)
 
+    def render_dependencies(self) -> list:
+        """
+        Renderables that must be rendered before this one
+        """
+        return []
+
+    def prepare(self, renderer, **kwargs):
+        """
+        Called by `Renderer.render_all` for every renderable it is going to render, before any of them is rendered
+        """
+        pass
+
     def pre_render(self, renderer, **kwargs):
         assert not renderer.is_rendered(self), f'{self} is already rendered'
 
@@ -17,9 +31,33 @@ class Renderable(metaclass=InstanceCounterMeta):
     def post_render(self, renderer, **kwargs):
         pass
 
-    def render(self, renderer, **kwargs):
+    def render(self, renderer, ignore_dependencies=False, **kwargs):
+        """
+        Renders the renderable with all its not yet rendered dependencies.
+        `ignore_dependencies` is deprecated, use `render_node` to render only the renderable
+        """
+        if ignore_dependencies:
+            warnings.warn('ignore_dependencies is deprecated, use render_node', DeprecationWarning, stacklevel=2)
+            self.prepare(renderer, **kwargs)
+            self.render_node(renderer, **kwargs)
+            renderer.mark_rendered(self)
+            return
+        renderer.render_all([self], **kwargs)
+
+    def render_node(self, renderer, **kwargs):
+        """
+        Renders only the renderable itself, its dependencies must be already rendered
+        """
         self.pre_render(renderer, **kwargs)
-        self.do_render(renderer, **kwargs)
+        accounting = renderer.accounting
+        if accounting is None:
+            self.do_render(renderer, **kwargs)
+        else:
+            accounting.enter(self)
+            try:
+                self.do_render(renderer, **kwargs)
+            finally:
+                accounting.exit()
         self.post_render(renderer, **kwargs)
 
     def __str__(self):
@@ -40,20 +78,73 @@ class RenderableObject(Renderable):
 
     @property
     def axes(self) -> Axes:
-        if self._axes is None:
-            if self.dependencies:
-                self._axes = closure(*[dep.axes for dep in self.dependencies])
-            else:
-                self._axes = self.new_axes()
+        # computed for the not yet known dependencies first, without recursion, as dependency chains can be long
+        stack = [self]
+        while stack:
+            obj = stack[-1]
+            if obj._axes is not None:
+                stack.pop()
+                continue
+            unknown = [dep for dep in obj.dependencies if dep._axes is None]
+            if unknown:
+                stack.extend(unknown)
+                continue
+            stack.pop()
+            obj._axes = closure(*[dep._axes for dep in obj.dependencies]) if obj.dependencies else obj.new_axes()
         return self._axes
 
     @staticmethod
     def new_axes():
         raise NotImplementedError
 
+    def render_dependencies(self) -> list:
+        return list(self.dependencies)
+
     def pre_render(self, renderer, ignore_dependencies=False, **kwargs):
+        # dependencies are rendered by `Renderer.render_all` now, `ignore_dependencies` is accepted for compatibility
+        if ignore_dependencies:
+            warnings.warn('ignore_dependencies is deprecated, pre_render does not render dependencies',
+                          DeprecationWarning, stacklevel=2)
         super().pre_render(renderer, **kwargs)
-        if not ignore_dependencies:
-            for dep in self.dependencies:
-                if not renderer.is_rendered(dep):
-                    dep.render(renderer, **kwargs)
+
+
+def topological_order(roots, is_rendered=None) -> list:
+    """
+    `roots` and the renderables they need, every one after its render dependencies and each once.
+    Renderables for which `is_rendered` is true are left out together with the dependencies reached only through them
+    """
+    order = []
+    reached = set()
+    stack = []  # [(renderable, iterator over its render dependencies)], the current path of the depth-first search
+
+    def reach(renderable):
+        if renderable in reached or (is_rendered is not None and is_rendered(renderable)):
+            return False
+        reached.add(renderable)
+        stack.append((renderable, iter(renderable.render_dependencies())))
+        return True
+
+    for root in roots:
+        reach(root)
+        while stack:
+            renderable, dependencies = stack[-1]
+            if not any(reach(dep) for dep in dependencies):
+                stack.pop()
+                order.append(renderable)
+    return order
+
+
+def render_levels(order) -> list:
+    """
+    Splits a topological order into levels: every renderable depends only on the ones of the previous levels,
+    so the renderables of one level are independent of each other
+    """
+    level = {}
+    levels = []
+    for renderable in order:
+        index = max((level[dep] + 1 for dep in renderable.render_dependencies() if dep in level), default=0)
+        level[renderable] = index
+        if index == len(levels):
+            levels.append([])
+        levels[index].append(renderable)
+    return levels
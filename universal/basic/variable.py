@@ -24,3 +24,21 @@ class Variable(RenderableObject):
 
     def is_free(self):
         return self.array is None
+
+
+class Constant(Variable):
+    """
+    Variable with a fixed value and no axes
+    """
+    name = 'constant'
+
+    def __init__(self, value: bool, **kwargs):
+        super().__init__(**kwargs)
+        self.value = bool(value)
+
+    @staticmethod
+    def new_axes():
+        return Axes()
+
+    def do_render(self, renderer, **kwargs):
+        renderer.render_constant(self, **kwargs)
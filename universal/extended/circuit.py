@@ -3,18 +3,44 @@ from universal.extended import Gate
 
 
 class Circuit(RenderableMapping):
-    def __init__(self, input_degree, output_degree, n_gates):
+    """
+    `symmetry_breaking` is a collection of constraints from SYMMETRY_BREAKING added when the circuit is rendered:
+        'ordered' -- a gate that does not use the previous gate has a lexicographically greater or equal pair of inputs
+        'non_trivial' -- gate functions are neither constant nor a projection on one of the inputs (negations are allowed)
+        'all_used' -- every gate is used by a later gate or an output
+        'normal' -- gates that are not outputs are 0 on the all-zero input
+    'ordered' and 'normal' keep every function representable, 'non_trivial' and 'all_used' restrict the search
+    to circuits with no redundant gates (e.g. they cannot produce a constant output).
+    `fused_gates` makes the gates fused (see Gate)
+    """
+    SYMMETRY_BREAKING = ('ordered', 'non_trivial', 'all_used', 'normal')
+    COMPLETE_SYMMETRY_BREAKING = ('ordered', 'normal')  # options keeping every function representable
+
+    def __init__(self, input_degree, output_degree, n_gates, symmetry_breaking=(), fused_gates=False):
         super().__init__(input_degree, output_degree)
-        self.gates = [Gate(input_degree=self.input_degree + i) for i in range(n_gates)]
+        assert all(option in self.SYMMETRY_BREAKING for option in symmetry_breaking), \
+            f'Symmetry breaking options must be from {self.SYMMETRY_BREAKING}, got {symmetry_breaking}'
+        self.symmetry_breaking = tuple(symmetry_breaking)
+        self.fused_gates = fused_gates
+        self.gates = [Gate(input_degree=self.input_degree + i, fused=fused_gates) for i in range(n_gates)]
         self.choice = ChoiceMapping(input_degree=self.input_degree + n_gates, output_degree=self.output_degree)
 
+    @classmethod
+    def is_complete(cls, symmetry_breaking) -> bool:
+        """
+        Whether the circuits with the `symmetry_breaking` options represent every function a circuit can
+        """
+        return all(option in cls.COMPLETE_SYMMETRY_BREAKING for option in symmetry_breaking)
+
     def __call__(self, input_vars, **kwargs):
         variables = list(input_vars)
         for gate in self.gates:
             variables.extend(gate(variables, **kwargs))
         return self.choice(variables, **kwargs)
 
+    def render_dependencies(self) -> list:
+        return self.gates + [self.choice]
+
     def do_render(self, renderer, **kwargs):
-        for gate in self.gates:
-            gate.render(renderer, **kwargs)
-        self.choice.render(renderer, **kwargs)
+        if self.symmetry_breaking:
+            renderer.render_symmetry_breaking(self, **kwargs)
@@ -2,15 +2,26 @@ from universal.basic import RenderableMapping, ChoiceMapping, FunctionMapping
 
 
 class Gate(RenderableMapping):
-    def __init__(self, input_degree):
+    """
+    A `fused` gate has its output array directly over the inputs (with the gate as origin), and the renderer
+    ties it to the chosen inputs and the function at once instead of going through the chosen input variables
+    """
+    name = 'gate'
+
+    def __init__(self, input_degree, fused=False):
         super().__init__(input_degree, output_degree=1)
+        self.fused = fused
         self.choice = ChoiceMapping(input_degree=self.input_degree, output_degree=2)
         self.function = FunctionMapping(input_degree=2, output_degree=1)
 
     def __call__(self, input_vars, **kwargs):
+        if self.fused:
+            return super().__call__(input_vars, **kwargs)
         choices_array = self.choice(input_vars, **kwargs)
         return self.function(choices_array.variables, **kwargs)
 
+    def render_dependencies(self) -> list:
+        return [self.choice, self.function]
+
     def do_render(self, renderer, **kwargs):
-        self.choice.render(renderer, **kwargs)
-        self.function.render(renderer, **kwargs)
+        pass
@@ -1,16 +1,59 @@
-from universal.basic import Renderable, Variable, Array, FunctionMapping, ChoiceMapping, Equality
+from universal.basic.renderable import topological_order, render_levels
+from universal.basic import Renderable, Variable, Constant, Array, FunctionMapping, ChoiceMapping, Equality
+from universal.extended import Circuit, Gate
 from utils import encouple
 
 
 class Renderer:
     def __init__(self, **kwargs):
-        self.rendered = set()  # {variable_id}
+        self.rendered = set()  # {renderable}, renderables are hashed by identity
+        self.accounting = None  # e.g. metrics.RenderAccounting, told about every rendered renderable
+
+    def set_accounting(self, accounting):
+        """
+        `accounting` has `enter(renderable)` and `exit()`, called around the rendering of every renderable,
+        e.g. to count what it adds to the `size_counters`. None turns the accounting off
+        """
+        self.accounting = accounting
+
+    def size_counters(self) -> dict:
+        """
+        Named sizes of the rendered representation, e.g. the number of clauses
+        """
+        return {}
 
     def is_rendered(self, elem):
-        return str(elem) in self.rendered
+        return elem in self.rendered
 
     def mark_rendered(self, elem: Renderable):
-        self.rendered.add(str(elem))
+        self.rendered.add(elem)
+
+    def render_all(self, renderables, **kwargs):
+        """
+        Renders `renderables` with all their not yet rendered dependencies, without recursion.
+        All of them are prepared (see `Renderable.prepare`) before any is rendered
+        """
+        order = self.render_order(renderables)
+        for renderable in order:
+            renderable.prepare(self, **kwargs)
+        for renderable in order:
+            # rendering an array renders its variables as well
+            if not self.is_rendered(renderable):
+                renderable.render_node(self, **kwargs)
+                self.mark_rendered(renderable)
+
+    def render_order(self, renderables) -> list:
+        """
+        Not yet rendered renderables needed for `renderables`, every one after its render dependencies.
+        Computing it changes nothing in the renderer
+        """
+        return topological_order(renderables, is_rendered=self.is_rendered)
+
+    def render_levels(self, renderables) -> list:
+        """
+        `render_order` split into levels of renderables independent of each other (see `render_levels`)
+        """
+        return render_levels(self.render_order(renderables))
 
     def render_variable(self, variable: Variable, **kwargs):
         if variable.is_free():
@@ -24,11 +67,16 @@ class Renderer:
     def render_bound_variable(self, variable: Variable, **kwargs):
         raise NotImplementedError
 
+    def render_constant(self, constant: Constant, **kwargs):
+        raise NotImplementedError
+
     def render_array(self, array: Array, **kwargs):
         if isinstance(array.origin, FunctionMapping):
             self.render_function_output(array, **kwargs)
         elif isinstance(array.origin, ChoiceMapping):
             self.render_choice_output(array, **kwargs)
+        elif isinstance(array.origin, Gate):
+            self.render_gate_output(array, **kwargs)
         else:
             raise TypeError(f'Unknown origin type {type(array.origin)}')
 
@@ -38,12 +86,27 @@ class Renderer:
     def render_choice_output(self, array: Array, **kwargs):
         raise NotImplementedError
 
+    def render_gate_output(self, array: Array, **kwargs):
+        raise NotImplementedError
+
     def render_function_mapping(self, function: FunctionMapping, **kwargs):
         raise NotImplementedError
 
     def render_choice_mapping(self, choice_map: ChoiceMapping, **kwargs):
         raise NotImplementedError
 
+    def render_gate_selectors(self, circuit: Circuit, **kwargs) -> list:
+        raise NotImplementedError
+
+    def render_symmetry_breaking(self, circuit: Circuit, **kwargs):
+        raise NotImplementedError
+
+    def prepare_equality(self, equality: Equality, **kwargs):
+        """
+        Called before the variables of `equality` are rendered, e.g. to make them share their representation
+        """
+        pass
+
     def render_equality(self, equality: Equality, **kwargs):
         for var1, var2 in encouple(equality.variables):
             self.set_equal(var1, var2, **kwargs)
@@ -51,7 +114,7 @@ class Renderer:
     def set_equal(self, variable1: Variable, variable2: Variable, **kwargs):
         raise NotImplementedError
 
-    def init_solver(self, solver):
+    def init_solver(self, solver, start=0):
         raise NotImplementedError
 
     def log_stat(self):
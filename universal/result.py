@@ -1,6 +1,7 @@
 from utils import encouple
 from universal.basic import ChoiceMapping, FunctionMapping
 from universal.extended import Gate, Circuit
+from universal.truthtable import TruthTable, input_index
 
 
 class MappingResult:
@@ -28,16 +29,23 @@ class ChoiceMappingResult(MappingResult):
 class FunctionMappingResult(MappingResult):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.values = [{} for _ in range(self.output_degree)]
+        self.values = TruthTable(input_degree=self.input_degree, output_degree=self.output_degree)
         self.input_space_size = 2 ** self.input_degree
 
     def set_value(self, input_index, output_value, output_index):
-        assert input_index not in self.values[output_index], f'Index {input_index} is already set for output {output_index}'
-        assert 0 <= input_index < self.input_space_size, f'Input index must be in range [0, {self.input_space_size})'
-        self.values[output_index][input_index] = output_value
+        self.values.set(output_index=output_index, input_index=input_index, value=output_value)
+
+    def set_column(self, output_index, column):
+        self.values.set_column(output_index=output_index, column=column)
 
     def is_valid(self) -> bool:
-        return all((len(out) == self.input_space_size for out in self.values))
+        return self.values.is_complete()
+
+    def evaluate(self, inputs) -> list:
+        """
+        Outputs on `inputs`, the first input is the most significant bit of the input index
+        """
+        return self.values.row(input_index(inputs))
 
 
 class GateResult(MappingResult):
@@ -50,6 +58,12 @@ class GateResult(MappingResult):
     def is_valid(self) -> bool:
         return self.choice_result.is_valid() and self.function_result.is_valid()
 
+    def evaluate(self, values) -> bool:
+        """
+        Output of the gate, `values` are the values of all the wires it can choose from
+        """
+        return self.function_result.evaluate([values[choice] for choice in self.choice_result.choices])[0]
+
 
 class CircuitResult(MappingResult):
     def __init__(self, gate_results: list, choice_result: ChoiceMappingResult):
@@ -60,6 +74,38 @@ class CircuitResult(MappingResult):
     def is_valid(self) -> bool:
         return all([gate_result.is_valid() for gate_result in self.gate_results]) and self.choice_result.is_valid()
 
+    def evaluate(self, inputs) -> list:
+        values = list(inputs)
+        for gate_result in self.gate_results:
+            values.append(gate_result.evaluate(values))
+        return [values[choice] for choice in self.choice_result.choices]
+
+    def used_gates(self) -> list:
+        """
+        Sorted indices of the gates the outputs depend on
+        """
+        used = set()
+        stack = list(self.choice_result.choices)
+        while stack:
+            gate_index = stack.pop() - self.input_degree
+            if gate_index >= 0 and gate_index not in used:
+                used.add(gate_index)
+                stack.extend(self.gate_results[gate_index].choice_result.choices)
+        return sorted(used)
+
+    def prefix(self, n_gates) -> 'CircuitResult':
+        """
+        Circuit of the first `n_gates` gates, the outputs must not use any other gate
+        """
+        assert all(choice < self.input_degree + n_gates for choice in self.choice_result.choices), \
+            f'Outputs use gates beyond the first {n_gates}'
+        choice_result = ChoiceMappingResult(
+            self.choice_result.choices,
+            input_degree=self.input_degree + n_gates,
+            output_degree=self.output_degree,
+        )
+        return CircuitResult(gate_results=self.gate_results[:n_gates], choice_result=choice_result)
+
 
 class Decoder:
     def consume_model(self, model):
@@ -0,0 +1,95 @@
+class TruthTable:
+    """
+    Values of the outputs of a function on all 2^input_degree inputs, one packed bit array per output.
+    The `r`-th bit of an output is its value on the `r`-th input of `all_inputs` (first input is the most significant
+    bit of `r`), bit `r` of the little-endian byte array is bit `r % 8` of byte `r // 8`, as in `int.from_bytes`.
+    `defined` has the same layout and marks the values that were set
+    """
+    def __init__(self, input_degree, output_degree):
+        self.input_degree = input_degree
+        self.output_degree = output_degree
+        self.size = 2 ** input_degree
+        self.n_bytes = (self.size + 7) // 8
+        self.bits = [bytearray(self.n_bytes) for _ in range(output_degree)]
+        self.defined = [bytearray(self.n_bytes) for _ in range(output_degree)]
+
+    def __getitem__(self, key) -> bool:
+        output_index, input_index = key
+        assert self.is_defined(output_index, input_index), f'Value {input_index} of output {output_index} is not set'
+        return bool(self.bits[output_index][input_index >> 3] >> (input_index & 7) & 1)
+
+    def is_defined(self, output_index, input_index) -> bool:
+        self._check(output_index, input_index)
+        return bool(self.defined[output_index][input_index >> 3] >> (input_index & 7) & 1)
+
+    def set(self, output_index, input_index, value):
+        assert not self.is_defined(output_index, input_index), f'Index {input_index} is already set for output {output_index}'
+        bit = 1 << (input_index & 7)
+        self.defined[output_index][input_index >> 3] |= bit
+        if value:
+            self.bits[output_index][input_index >> 3] |= bit
+
+    def set_column(self, output_index, column, defined=None):
+        """
+        Sets the values of an output from an int whose bit `r` is the value on the `r`-th input,
+        only the bits of `defined` (all by default) are set
+        """
+        assert 0 <= output_index < self.output_degree, f'output_index is {output_index}, must be in [0, {self.output_degree})'
+        full = (1 << self.size) - 1
+        defined = full if defined is None else defined
+        assert 0 <= column <= full and 0 <= defined <= full, f'Columns must have {self.size} bits'
+        assert not self.defined_column(output_index) & defined, f'Some values of output {output_index} are already set'
+        self.bits[output_index] = bytearray((self.column(output_index) | column & defined).to_bytes(self.n_bytes, 'little'))
+        self.defined[output_index] = bytearray((self.defined_column(output_index) | defined).to_bytes(self.n_bytes, 'little'))
+
+    def column(self, output_index) -> int:
+        return int.from_bytes(self.bits[output_index], 'little')
+
+    def defined_column(self, output_index) -> int:
+        return int.from_bytes(self.defined[output_index], 'little')
+
+    def items(self, output_index):
+        """
+        Pairs (input index, value) of the defined values of an output in increasing input order
+        """
+        bits, defined = self.bits[output_index], self.defined[output_index]
+        for byte_index, defined_byte in enumerate(defined):
+            if defined_byte:
+                byte = bits[byte_index]
+                for shift in range(8):
+                    if defined_byte >> shift & 1:
+                        yield byte_index * 8 + shift, bool(byte >> shift & 1)
+
+    def row(self, input_index) -> list:
+        return [self[output_index, input_index] for output_index in range(self.output_degree)]
+
+    def is_complete(self) -> bool:
+        full = (1 << self.size) - 1
+        return all(self.defined_column(output_index) == full for output_index in range(self.output_degree))
+
+    def key(self) -> tuple:
+        """
+        Hashable snapshot of the contents, equal for equal tables. The table itself is mutable and not hashable
+        """
+        return self.input_degree, self.output_degree, tuple(map(bytes, self.bits)), tuple(map(bytes, self.defined))
+
+    def __eq__(self, other):
+        if not isinstance(other, TruthTable):
+            return NotImplemented
+        return self.key() == other.key()
+
+    __hash__ = None
+
+    def _check(self, output_index, input_index):
+        assert 0 <= output_index < self.output_degree, f'output_index is {output_index}, must be in [0, {self.output_degree})'
+        assert 0 <= input_index < self.size, f'Input index must be in range [0, {self.size})'
+
+
+def input_index(input_values) -> int:
+    """
+    Index of the input in `all_inputs` order
+    """
+    index = 0
+    for value in input_values:
+        index = 2 * index + int(value)
+    return index
@@ -50,9 +50,16 @@ def print_dependency_tree(var, offset=0, step=2):
 
 
 @contextmanager
-def time_and_log(process_name):
+def time_and_log(process_name, metrics=None):
+    """
+    Prints the time the process took, and records it as a phase of `metrics` (metrics.Metrics) if given
+    """
     start_time = perf_counter()
     try:
-        yield
+        if metrics is None:
+            yield
+        else:
+            with metrics.phase(process_name):
+                yield
     finally:
         print(f'{process_name} finished in {perf_counter() - start_time} seconds')